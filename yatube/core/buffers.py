@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FlushBuffer:
+    """Накопитель значений в памяти процесса с периодическим сбросом.
+
+    add() только объединяет значение с уже накопленным по ключу;
+    фоновый поток раз в getattr(settings, interval_setting) секунд
+    вызывает flush(), а тот передает накопленное в save(). Если save()
+    упал, значения возвращаются в буфер до следующего раза.
+
+    Подкласс задает interval_setting и методы merge(old, new) - как
+    объединить два значения одного ключа - и save(items) - куда записать
+    накопленный словарь.
+    """
+
+    interval_setting = None
+    thread_name = 'flush-buffer'
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._items:
+                value = self.merge(self._items[key], value)
+            self._items[key] = value
+            if self._flusher is None:
+                self._start_flusher()
+
+    def pending(self, key, default=None):
+        with self._lock:
+            return self._items.get(key, default)
+
+    def _start_flusher(self):
+        interval = getattr(settings, self.interval_setting)
+        if not interval:
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_forever, args=(interval,),
+            name=self.thread_name, daemon=True,
+        )
+        self._flusher.start()
+
+    def _flush_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось сбросить буфер %s',
+                                 self.thread_name)
+
+    def flush(self):
+        """Передает накопленное в save() и возвращает его результат."""
+        with self._lock:
+            items, self._items = self._items, {}
+        if not items:
+            return 0
+        try:
+            return self.save(items)
+        except Exception:
+            with self._lock:
+                for key, value in items.items():
+                    if key in self._items:
+                        value = self.merge(value, self._items[key])
+                    self._items[key] = value
+            raise
@@ -0,0 +1,325 @@
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control, patch_response_headers
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+SHELL_GENERATION_KEY = 'shell_generation:{scope}'
+# Раздел, от которого зависят все оболочки: invalidate_shells() без
+# аргументов сбрасывает их все сразу.
+GLOBAL_SCOPE = 'all'
+# Значения фрагментов {% hole %} хранятся в общем кэше вместе с
+# оболочкой, поэтому это только простые значения, а не модели и формы.
+HOLE_VALUE_TYPES = (str, int, float, bool, type(None))
+HOLE_MARKER = '<!--hole:{}-->'
+HOLE_RE = re.compile(rb'<!--hole:(\d+)-->')
+
+
+class LRUCache:
+    """Ограниченный по размеру кэш в памяти процесса.
+
+    Хранит не более `maxsize` записей, вытесняя давно не использованные,
+    и отдает запись не дольше `timeout` секунд после сохранения.
+    """
+
+    def __init__(self, maxsize=128, timeout=300):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, default):
+        """Возвращает запись, вычисляя ее через `default()` при промахе."""
+        value = self.get(key)
+        if value is None:
+            value = default()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Удаляет записи, для значений которых `predicate` истинен."""
+        with self._lock:
+            for key, (expires, value) in list(self._data.items()):
+                if predicate(value):
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_or_refresh(key, build, soft_timeout, hard_timeout, version=None,
+                   beta=1.0):
+    """Значение из общего кэша с защитой от одновременного пересчета.
+
+    Запись считается свежей `soft_timeout` секунд и хранится
+    `hard_timeout` секунд. Устаревшую запись обновляет только запрос,
+    взявший блокировку, остальные в это время получают старое значение.
+    Незадолго до `soft_timeout` обновление запускается с вероятностью,
+    растущей к концу срока (XFetch), чтобы пересчет не совпадал у всех.
+    Запись с другим `version` тоже считается устаревшей.
+    Если `build()` вернул None, результат не кэшируется.
+    """
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, soft_expires, delta, entry_version = entry
+        jitter = -delta * beta * math.log(1 - random.random())
+        if (entry_version == version
+                and time.time() + jitter < soft_expires):
+            return value
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Запись собирает другой запрос: недолго ждем его результата.
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return build()
+    try:
+        started = time.time()
+        value = build()
+        if value is not None:
+            finished = time.time()
+            cache.set(
+                key,
+                (value, finished + soft_timeout, finished - started, version),
+                hard_timeout,
+            )
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def shell_generation_keys(scopes):
+    return [SHELL_GENERATION_KEY.format(scope=scope)
+            for scope in (GLOBAL_SCOPE, *scopes)]
+
+
+def get_versions(keys):
+    """Счетчики версий по ключам общего кэша, одним запросом к кэшу.
+
+    Отсутствующий счетчик начинается с текущего времени в мс, поэтому
+    после вытеснения из кэша он не совпадет ни с одним прежним.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def get_shell_generation(*scopes):
+    """Версия оболочек, зависящих от разделов scopes.
+
+    Складывается из поколений общего раздела и каждого из scopes, так
+    что изменение в одном разделе не сбрасывает оболочки остальных.
+    """
+    return '-'.join(map(str, get_versions(shell_generation_keys(scopes))))
+
+
+def invalidate_shells(*scopes):
+    """Помечает устаревшими оболочки разделов scopes (без них - все)."""
+    for key in shell_generation_keys(scopes)[1 if scopes else 0:]:
+        bump_version(key)
+
+
+def page_cache_key(request, key_prefix, per_user=True):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    if not per_user:
+        return f'shell:{key_prefix}:{url}'
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    return f'swr_page:{key_prefix}:{user}:{url}'
+
+
+def is_cacheable(response):
+    return (response.status_code == 200 and not response.streaming
+            and not response.cookies)
+
+
+def patch_page_headers(response, timeout, personal):
+    """Заголовки кэширования для браузера.
+
+    Персональную страницу браузер должен перепроверять каждый раз:
+    после подписки или комментария редирект ведет на ту же страницу,
+    и копия с max-age показала бы состояние до действия.
+    """
+    if personal:
+        patch_cache_control(response, private=True, no_cache=True, max_age=0)
+    else:
+        patch_response_headers(response, timeout)
+
+
+def page_version(scopes, request, args, kwargs):
+    if scopes is None:
+        return get_shell_generation()
+    return get_shell_generation(*scopes(request, *args, **kwargs))
+
+
+def cache_page_swr(soft_timeout, hard_timeout=None, key_prefix='',
+                   scopes=None):
+    """Аналог cache_page, отдающий устаревшую страницу во время пересчета.
+
+    Страница кэшируется отдельно для каждого пользователя и устаревает
+    вместе с оболочками своих разделов (см. cache_shell); ответы
+    с ошибкой или устанавливающие cookies не кэшируются.
+    """
+    hard_timeout = hard_timeout or soft_timeout * 10
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            rendered = []
+
+            def build():
+                response = view(request, *args, **kwargs)
+                rendered.append(response)
+                if not is_cacheable(response):
+                    return None
+                if hasattr(response, 'render'):
+                    response.render()
+                return (response.content, response['Content-Type'])
+
+            cached = get_or_refresh(
+                page_cache_key(request, key_prefix), build,
+                soft_timeout, hard_timeout,
+                version=page_version(scopes, request, args, kwargs),
+            )
+            if rendered:
+                response = rendered[0]
+            else:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            patch_page_headers(response, soft_timeout,
+                               request.user.is_authenticated)
+            return response
+        return wrapper
+    return decorator
+
+
+def fill_holes(request, content, holes):
+    """Подставляет в оболочку персональные фрагменты текущего запроса."""
+    def render_hole(match):
+        template_name, values = holes[int(match.group(1))]
+        return render_to_string(
+            template_name, values, request=request
+        ).encode()
+    return HOLE_RE.sub(render_hole, content)
+
+
+def render_shell(view, request, args, kwargs):
+    """Отрисовывает страницу с метками вместо персональных фрагментов."""
+    request.shell_holes = []
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    finally:
+        holes = request.shell_holes
+        del request.shell_holes
+    return response, holes
+
+
+def cache_shell(soft_timeout, hard_timeout=None, key_prefix='',
+                scopes=None):
+    """Кэширует общую для всех пользователей оболочку страницы.
+
+    Персональные фрагменты, отмеченные в шаблонах тегом {% hole %},
+    в кэш не попадают: на их месте остаются метки, которые для каждого
+    запроса заменяются отрисованными фрагментами. Оболочки устаревают
+    по времени и при изменении контента: scopes(request, *args, **kwargs)
+    возвращает разделы, от которых зависит страница, и оболочка
+    пересобирается после invalidate_shells() любого из них. Остальные
+    изменения (например, имя автора в чужой ленте) видны не позже чем
+    через soft_timeout.
+    """
+    hard_timeout = hard_timeout or soft_timeout * 10
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            rendered = []
+
+            def build():
+                response, holes = render_shell(view, request, args, kwargs)
+                rendered.append((response, holes))
+                if not is_cacheable(response):
+                    return None
+                return (response.content, response['Content-Type'], holes)
+
+            cached = get_or_refresh(
+                page_cache_key(request, key_prefix, per_user=False), build,
+                soft_timeout, hard_timeout,
+                version=page_version(scopes, request, args, kwargs),
+            )
+            if rendered:
+                response, holes = rendered[0]
+                if holes:
+                    response.content = fill_holes(
+                        request, response.content, holes
+                    )
+            else:
+                content, content_type, holes = cached
+                response = HttpResponse(
+                    fill_holes(request, content, holes),
+                    content_type=content_type,
+                )
+            # Фрагменты анонима одинаковы для всех анонимов, поэтому
+            # персональна только страница авторизованного пользователя.
+            patch_page_headers(response, soft_timeout,
+                               request.user.is_authenticated)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,57 @@
+import re
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+# Картинки постов (sha256) и миниатюры sorl (md5) названы хешем.
+CONTENT_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{32}(?:[0-9a-f]{32})?\.[^./]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, которые клиент готов принять."""
+    encodings = set()
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding)
+    return encodings
+
+
+def is_hashed_name(path):
+    """Имя файла содержит хеш содержимого (например, base.1a2b3c4d5e6f.css)."""
+    return bool(HASHED_NAME_RE.search(path))
+
+
+def is_content_named(path):
+    """Имя медиафайла - хеш его содержимого, файл никогда не меняется."""
+    return bool(CONTENT_NAME_RE.search(path))
+
+
+def parse_range(header, size):
+    """Один диапазон из заголовка Range как (start, end) включительно.
+
+    None - заголовок не поддерживается (например, несколько диапазонов)
+    и нужно отдать файл целиком; ValueError - диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError('Range not satisfiable')
+    return start, end
@@ -0,0 +1,40 @@
+import base64
+import io
+
+from PIL import Image, ImageFilter
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+PALETTE_COLORS = 4
+
+
+def describe_image(file):
+    """Размеры, основной цвет и размытая миниатюра картинки.
+
+    Возвращает (ширина, высота, '#rrggbb', data URI JPEG-заглушки
+    не больше PLACEHOLDER_SIZE пикселей по стороне). Позиция в файле
+    после чтения возвращается в начало.
+
+    Картинка уменьшается до преобразования цветов, а JPEG через draft()
+    сразу декодируется в уменьшенном масштабе: большие загрузки не
+    раскодируются в полном размере.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image.draft('RGB', (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        small = image.convert('RGB')
+    file.seek(0)
+    paletted = small.quantize(colors=PALETTE_COLORS)
+    _, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    buffer = io.BytesIO()
+    small.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, 'JPEG', quality=PLACEHOLDER_QUALITY
+    )
+    placeholder = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return (
+        width, height, f'#{red:02x}{green:02x}{blue:02x}',
+        f'data:image/jpeg;base64,{placeholder}',
+    )
@@ -0,0 +1,74 @@
+import re
+
+from django.template import Origin
+from django.template.loaders.base import Loader as BaseLoader
+
+PRESERVED_RE = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I
+)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+LEADING_WHITESPACE_RE = re.compile(r'\n\s+')
+TRAILING_WHITESPACE_RE = re.compile(r'[ \t]+\n')
+# Минифицируются только HTML-страницы: в письмах (password_reset_email.html,
+# *_subject.txt), текстовых и XML-шаблонах пробелы и пустые строки значимы.
+MINIFIED_EXTENSIONS = ('.html',)
+NOT_MINIFIED_RE = re.compile(r'(email|subject)[^/]*$')
+
+
+def _minify(text):
+    text = HTML_COMMENT_RE.sub('', text)
+    text = TRAILING_WHITESPACE_RE.sub('\n', text)
+    return LEADING_WHITESPACE_RE.sub('\n', text)
+
+
+def minify_template(source):
+    """Убирает отступы, пустые строки и HTML-комментарии из шаблона.
+
+    Содержимое <pre>, <textarea>, <script> и <style> не меняется,
+    переводы строк сохраняются, поэтому пробелы между строчными
+    элементами по-прежнему значимы.
+    """
+    chunks = []
+    position = 0
+    for match in PRESERVED_RE.finditer(source):
+        chunks.append(_minify(source[position:match.start()]))
+        chunks.append(match.group(0))
+        position = match.end()
+    chunks.append(_minify(source[position:]))
+    return ''.join(chunks)
+
+
+def is_minified(template_name):
+    return (template_name.endswith(MINIFIED_EXTENSIONS)
+            and not NOT_MINIFIED_RE.search(template_name))
+
+
+class MinifyingLoader(BaseLoader):
+    """Обертка над загрузчиками, минифицирующая исходник шаблона.
+
+    Минификация выполняется один раз при компиляции, поэтому загрузчик
+    стоит оборачивать в django.template.loaders.cached.Loader. Шаблоны
+    не из списка HTML-страниц (см. is_minified) отдаются без изменений.
+    """
+
+    def __init__(self, engine, loaders):
+        self.loaders = engine.get_template_loaders(loaders)
+        super().__init__(engine)
+
+    def get_template_sources(self, template_name):
+        for loader in self.loaders:
+            for source in loader.get_template_sources(template_name):
+                origin = Origin(
+                    name=source.name,
+                    template_name=source.template_name,
+                    loader=self,
+                )
+                origin.source = source
+                yield origin
+
+    def get_contents(self, origin):
+        source = origin.source
+        contents = source.loader.get_contents(source)
+        if not is_minified(origin.template_name):
+            return contents
+        return minify_template(contents)
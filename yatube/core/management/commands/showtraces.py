@@ -0,0 +1,112 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def iter_spans(span, depth=0):
+    yield span, depth
+    for child in span['children']:
+        yield from iter_spans(child, depth + 1)
+
+
+def span_label(span):
+    attrs = span['attrs']
+    detail = (attrs.get('sql') or attrs.get('template') or attrs.get('view')
+              or attrs.get('path') or '')
+    return f'{span["name"]} {detail}'.strip()
+
+
+def self_time(span):
+    return span['duration_ms'] - sum(
+        child['duration_ms'] for child in span['children']
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Просмотр записанных трасс: дерево участков запроса, сводка по видам '
+        'участков или экспорт в формат Chrome trace (chrome://tracing).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.TRACE_LOG,
+            help='Файл с трассами в формате JSON lines.',
+        )
+        parser.add_argument(
+            '--slowest', type=int, default=5,
+            help='Сколько самых медленных трасс показать.',
+        )
+        parser.add_argument(
+            '--path', default='',
+            help='Показывать только запросы с таким началом пути.',
+        )
+        parser.add_argument(
+            '--chrome',
+            help='Сохранить выбранные трассы в файл формата Chrome trace.',
+        )
+
+    def handle(self, *args, **options):
+        traces = self.load(options['log'], options['path'])
+        traces.sort(key=lambda trace: trace['duration_ms'], reverse=True)
+        traces = traces[:options['slowest']]
+        if options['chrome']:
+            self.export_chrome(traces, options['chrome'])
+            self.stdout.write(
+                f'Сохранено трасс: {len(traces)} в {options["chrome"]}'
+            )
+            return
+        for trace in traces:
+            self.print_trace(trace)
+
+    def load(self, path, prefix):
+        try:
+            with open(path, encoding='utf-8') as log:
+                traces = [json.loads(line) for line in log if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f'Файл трасс {path} не найден.')
+        return [
+            trace for trace in traces
+            if trace['span']['attrs'].get('path', '').startswith(prefix)
+        ]
+
+    def print_trace(self, trace):
+        root = trace['span']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{root["attrs"].get("method")} {root["attrs"].get("path")} '
+            f'{root["attrs"].get("status")} {trace["duration_ms"]:.1f} мс '
+            f'[{trace["trace_id"]}]'
+        ))
+        totals = {}
+        for span, depth in iter_spans(root):
+            kind = totals.setdefault(span['kind'], [0, 0.0])
+            kind[0] += 1
+            kind[1] += self_time(span)
+            self.stdout.write(
+                f'{"  " * depth}{span["duration_ms"]:8.2f} мс  '
+                f'{span_label(span)[:100]}'
+            )
+        for kind, (count, total) in sorted(
+            totals.items(), key=lambda item: -item[1][1]
+        ):
+            self.stdout.write(f'  {kind}: {count} шт., {total:.2f} мс')
+        self.stdout.write('')
+
+    def export_chrome(self, traces, path):
+        events = []
+        for tid, trace in enumerate(traces, start=1):
+            origin = trace['started'] * 1e6
+            for span, depth in iter_spans(trace['span']):
+                events.append({
+                    'name': span_label(span)[:200],
+                    'cat': span['kind'],
+                    'ph': 'X',
+                    'ts': origin + span['start_ms'] * 1000,
+                    'dur': span['duration_ms'] * 1000,
+                    'pid': 1,
+                    'tid': tid,
+                    'args': span['attrs'],
+                })
+        with open(path, 'w', encoding='utf-8') as out:
+            json.dump({'traceEvents': events}, out, ensure_ascii=False)
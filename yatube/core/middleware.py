@@ -0,0 +1,186 @@
+import gzip
+import io
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import tracing
+from .http import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Уровни сжатия по типу содержимого: gzip 1-9, brotli 0-11.
+# Типы, которых нет в словаре (картинки, архивы), не сжимаются,
+# settings.COMPRESSION_LEVELS дополняет и переопределяет словарь.
+DEFAULT_COMPRESSION_LEVELS = {
+    'text/html': {'gzip': 6, 'br': 5},
+    'text/css': {'gzip': 9, 'br': 11},
+    'text/plain': {'gzip': 6, 'br': 5},
+    'text/xml': {'gzip': 6, 'br': 5},
+    'application/javascript': {'gzip': 9, 'br': 11},
+    'application/json': {'gzip': 6, 'br': 5},
+    'application/xml': {'gzip': 6, 'br': 5},
+    'application/rss+xml': {'gzip': 6, 'br': 5},
+    'application/atom+xml': {'gzip': 6, 'br': 5},
+    'image/svg+xml': {'gzip': 9, 'br': 11},
+}
+DEFAULT_COMPRESSION_MIN_LENGTH = 200
+# Потоковые ответы (статика без сжатой копии, ленты) сжимаются при каждом
+# запросе, поэтому их уровень не выше этого потолка: 9 и 11 окупаются
+# только для заранее сжатых файлов. Переопределяется
+# settings.COMPRESSION_STREAMING_LEVELS.
+DEFAULT_STREAMING_COMPRESSION_LEVELS = {'gzip': 5, 'br': 4}
+
+
+def gzip_sequence(sequence, level):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(mode='wb', compresslevel=level, fileobj=buffer,
+                       mtime=0) as zfile:
+        for item in sequence:
+            zfile.write(item)
+            zfile.flush(zlib.Z_SYNC_FLUSH)
+            data = buffer.getvalue()
+            if data:
+                yield data
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+def brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress(content, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, level, mtime=0)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы gzip или brotli, в том числе потоковые.
+
+    Уровень сжатия задается для каждого типа содержимого, для потоковых
+    ответов он ограничен сверху. Ответы короче
+    settings.COMPRESSION_MIN_LENGTH, уже сжатые и ответы не 200 отдаются
+    как есть.
+    """
+
+    def choose_encoding(self, request, levels):
+        encodings = accepted_encodings(request)
+        if brotli is not None and 'br' in encodings and 'br' in levels:
+            return 'br'
+        if 'gzip' in encodings and 'gzip' in levels:
+            return 'gzip'
+        return None
+
+    def is_short(self, response):
+        """Короткий ответ; потоковый - если его длина известна заранее."""
+        min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH',
+                             DEFAULT_COMPRESSION_MIN_LENGTH)
+        if not response.streaming:
+            return len(response.content) < min_length
+        length = response.get('Content-Length')
+        return length is not None and int(length) < min_length
+
+    def process_response(self, request, response):
+        # Частичные ответы (206 с Content-Range) и ошибки не перекодируем:
+        # диапазон байт относится к исходному, несжатому содержимому.
+        if (response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or response.has_header('Content-Range')):
+            return response
+        content_type = response.get('Content-Type', '')
+        content_type = content_type.split(';')[0].strip().lower()
+        levels = getattr(settings, 'COMPRESSION_LEVELS', {}).get(
+            content_type, DEFAULT_COMPRESSION_LEVELS.get(content_type)
+        )
+        if not levels or self.is_short(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request, levels)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compress_sequence = (
+                brotli_sequence if encoding == 'br' else gzip_sequence
+            )
+            ceiling = getattr(
+                settings, 'COMPRESSION_STREAMING_LEVELS',
+                DEFAULT_STREAMING_COMPRESSION_LEVELS,
+            )[encoding]
+            response.streaming_content = compress_sequence(
+                response.streaming_content, min(levels[encoding], ceiling)
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding,
+                                  levels[encoding])
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class TracingMiddleware:
+    """Строит дерево участков для выборки запросов и пишет его в лог.
+
+    Доля запросов задается settings.TRACE_SAMPLE_RATE, трассы пишутся
+    построчно в JSON в settings.TRACE_LOG. Должен стоять первым в
+    MIDDLEWARE: вызов каждого следующего middleware попадает в свой
+    участок, вызов представления отмечает TraceViewMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        tracing.install_hooks()
+        tracing.trace_middleware(self)
+
+    def __call__(self, request):
+        if not tracing.is_sampled(request):
+            return self.get_response(request)
+        trace, stack = tracing.start_trace(request)
+        status = None
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            tracing.finish_trace(trace, stack, status)
+
+
+class TraceViewMiddleware(MiddlewareMixin):
+    """Оборачивает вызов представления в участок трассы.
+
+    Должен стоять последним в MIDDLEWARE: он сам вызывает представление,
+    поэтому остальные process_view должны отработать раньше.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if tracing.current_trace() is None:
+            return None
+        name = getattr(view_func, '__qualname__', repr(view_func))
+        with tracing.span('view', 'view',
+                          view=f'{view_func.__module__}.{name}'):
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        return response
@@ -0,0 +1,39 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для больших таблиц: не делает полный COUNT(*).
+
+    Для таблицы без фильтров берется оценка (reltuples в PostgreSQL,
+    наибольший первичный ключ в остальных базах). Отфильтрованная
+    выборка считается не дальше ESTIMATE_THRESHOLD строк, поэтому
+    последние страницы большой выборки могут быть недоступны по номеру.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            estimate = self.table_estimate(queryset)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset.order_by()[:ESTIMATE_THRESHOLD].count()
+
+    def table_estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            return int(row[0]) if row else None
+        return queryset.order_by().aggregate(last=Max('pk'))['last']
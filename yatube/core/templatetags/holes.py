@@ -0,0 +1,58 @@
+from django import template
+from django.template.base import token_kwargs
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.caching import HOLE_MARKER, HOLE_VALUE_TYPES
+
+register = template.Library()
+
+
+class HoleNode(template.Node):
+    def __init__(self, template_name, extra_context):
+        self.template_name = template_name
+        self.extra_context = extra_context
+
+    def render(self, context):
+        template_name = self.template_name.resolve(context)
+        values = {
+            name: value.resolve(context)
+            for name, value in self.extra_context.items()
+        }
+        for name, value in values.items():
+            if not isinstance(value, HOLE_VALUE_TYPES):
+                raise template.TemplateSyntaxError(
+                    f'Фрагмент {template_name}: значение {name} должно '
+                    f'быть строкой, числом или None, а не '
+                    f'{type(value).__name__}'
+                )
+        request = context.get('request')
+        holes = getattr(request, 'shell_holes', None)
+        if holes is not None:
+            holes.append((template_name, values))
+            return mark_safe(HOLE_MARKER.format(len(holes) - 1))
+        # Так же, как fill_holes: с контекст-процессорами запроса.
+        return render_to_string(template_name, values, request=request)
+
+
+@register.tag
+def hole(parser, token):
+    """Персональный фрагмент страницы, который не попадает в кэш.
+
+    Использование:
+    {% hole 'includes/follow_button.html' author_id=post.author_id %}
+    Фрагмент видит только переданные значения и контекст-процессоры.
+    Значения попадают в общий кэш, поэтому допускаются только строки,
+    числа и None: id вместо моделей.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} требует имя шаблона фрагмента'
+        )
+    extra_context = token_kwargs(bits[2:], parser)
+    if len(extra_context) != len(bits) - 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает только именованные аргументы'
+        )
+    return HoleNode(parser.compile_filter(bits[1]), extra_context)
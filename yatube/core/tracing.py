@@ -0,0 +1,204 @@
+import inspect
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+CACHE_METHODS = (
+    'get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many',
+    'incr', 'decr', 'get_or_set',
+)
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_hooks_installed = False
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'attrs', 'start', 'end', 'children')
+
+    def __init__(self, name, kind, attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    def as_dict(self, origin):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(((self.end or self.start) - self.start)
+                                 * 1000, 3),
+            'attrs': self.attrs,
+            'children': [child.as_dict(origin) for child in self.children],
+        }
+
+
+class Trace:
+    def __init__(self, name, **attrs):
+        self.id = uuid.uuid4().hex
+        self.started = time.time()
+        self.root = Span(name, 'request', attrs)
+        self.stack = [self.root]
+
+
+class span:
+    """Участок трассировки: `with span('thumbnail', 'thumbnail'):`.
+
+    Если текущий запрос не попал в выборку, ничего не записывает.
+    """
+
+    __slots__ = ('name', 'kind', 'attrs', 'span')
+
+    def __init__(self, name, kind='code', **attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self):
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            self.span = Span(self.name, self.kind, self.attrs)
+            trace.stack[-1].children.append(self.span)
+            trace.stack.append(self.span)
+        return self.span
+
+    def __exit__(self, *exc_info):
+        if self.span is not None:
+            self.span.end = time.perf_counter()
+            _local.trace.stack.pop()
+
+
+def traced(name, kind='code'):
+    """Декоратор, оборачивающий вызов функции в span."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'trace', None) is None:
+                return func(*args, **kwargs)
+            with span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    with span('sql', 'sql', sql=sql, many=many):
+        return execute(sql, params, many, context)
+
+
+def _traced_template_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        if getattr(_local, 'trace', None) is None:
+            return render(self, context)
+        with span('template', 'template', template=self.name):
+            return render(self, context)
+    return wrapper
+
+
+def _traced_middleware(handler, name):
+    @wraps(handler)
+    def wrapper(request):
+        if getattr(_local, 'trace', None) is None:
+            return handler(request)
+        with span('middleware', 'middleware', middleware=name):
+            return handler(request)
+    return wrapper
+
+
+def trace_middleware(owner):
+    """Оборачивает в участки вызовы всех middleware после owner.
+
+    Django заворачивает каждый middleware в convert_exception_to_response,
+    сам экземпляр доступен как __wrapped__, а следующий за ним - в его
+    get_response. Участки вложены так же, как вызовы middleware.
+    """
+    handler = getattr(owner, 'get_response', None)
+    while handler is not None:
+        middleware = getattr(handler, '__wrapped__', None)
+        if middleware is None or inspect.ismethod(middleware):
+            # Последний в цепочке - BaseHandler._get_response, вызов
+            # представления отмечает TraceViewMiddleware.
+            return
+        cls = type(middleware)
+        name = getattr(middleware, '__qualname__', cls.__qualname__)
+        module = getattr(middleware, '__module__', cls.__module__)
+        owner.get_response = _traced_middleware(handler, f'{module}.{name}')
+        owner = middleware
+        handler = getattr(owner, 'get_response', None)
+
+
+def install_hooks():
+    """Один раз подключает трассировку шаблонов и миниатюр."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    Template.render = _traced_template_render(Template.render)
+    try:
+        from sorl.thumbnail.base import ThumbnailBackend
+    except ImportError:
+        pass
+    else:
+        ThumbnailBackend.get_thumbnail = traced(
+            'thumbnail', 'thumbnail'
+        )(ThumbnailBackend.get_thumbnail)
+    _hooks_installed = True
+
+
+def _trace_cache(stack):
+    # Экземпляр кэша свой у каждого потока, поэтому обертки на время
+    # запроса ставятся прямо на него и не влияют на другие запросы.
+    backend = caches['default']
+    for method in CACHE_METHODS:
+        original = getattr(backend, method)
+        setattr(backend, method, traced(f'cache.{method}', 'cache')(original))
+        stack.callback(backend.__dict__.pop, method, None)
+
+
+def is_sampled(request):
+    rate = getattr(settings, 'TRACE_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+def start_trace(request):
+    trace = Trace('request', method=request.method,
+                  path=request.get_full_path())
+    _local.trace = trace
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(_sql_wrapper))
+    _trace_cache(stack)
+    return trace, stack
+
+
+def finish_trace(trace, stack, status=None):
+    stack.close()
+    _local.trace = None
+    trace.root.end = time.perf_counter()
+    trace.root.attrs['status'] = status
+    record = {
+        'trace_id': trace.id,
+        'started': trace.started,
+        'duration_ms': round((trace.root.end - trace.root.start) * 1000, 3),
+        'span': trace.root.as_dict(trace.root.start),
+    }
+    line = json.dumps(record, ensure_ascii=False)
+    with _write_lock, open(settings.TRACE_LOG, 'a', encoding='utf-8') as log:
+        log.write(line + '\n')
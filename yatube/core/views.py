@@ -1,4 +1,26 @@
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+from .http import (
+    IMMUTABLE_CACHE_CONTROL, accepted_encodings, is_content_named,
+    is_hashed_name, parse_range,
+)
+
+PRECOMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+MEDIA_CACHE_CONTROL = 'public, max-age=3600'
+RANGE_CHUNK_SIZE = 64 * 1024
 
 
 def page_not_found(request, exception):
@@ -11,3 +33,127 @@ def csrf_failure(request, reason=''):
 
 def handler500(request):
     return render(request, 'core/500ServerError.html')
+
+
+def static_serve(request, path, document_root=None):
+    """Отдает собранную статику, выбирая предсжатую копию по
+    Accept-Encoding. document_root по умолчанию - STATIC_ROOT."""
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(document_root or settings.STATIC_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    content_type, _ = mimetypes.guess_type(fullpath)
+    encodings = accepted_encodings(request)
+    served_path, content_encoding = fullpath, None
+    for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+        if encoding in encodings and os.path.isfile(fullpath + suffix):
+            served_path, content_encoding = fullpath + suffix, encoding
+            break
+    statobj = os.stat(served_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              statobj.st_mtime, statobj.st_size):
+        return HttpResponseNotModified()
+    response = FileResponse(
+        open(served_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Last-Modified'] = http_date(statobj.st_mtime)
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed_name(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def sitemap_serve(request, path):
+    """Карта сайта, собранная командой build_sitemaps."""
+    return static_serve(request, path, settings.SITEMAP_ROOT)
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def offload_response(path, fullpath):
+    """Ответ без тела, файл отдаст фронтенд-сервер (nginx, Apache)."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+    else:
+        response['X-Sendfile'] = fullpath
+    return response
+
+
+def range_response(request, fullpath, size, etag, last_modified):
+    """206 с частью файла, если Range применим, иначе None."""
+    header = request.META.get('HTTP_RANGE')
+    if not header:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+        parse_http_date_safe(if_range) != int(last_modified)
+    ):
+        return None
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return None
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        read_range(fullpath, start, end - start + 1), status=206
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
+
+
+def media_serve(request, path):
+    """Отдает загруженные файлы в продакшене.
+
+    С settings.MEDIA_SENDFILE ('x-sendfile' или 'x-accel-redirect') сам
+    файл отдает фронтенд-сервер, иначе FileResponse через
+    wsgi.file_wrapper. Поддерживаются Range, If-None-Match
+    и If-Modified-Since. Файлы с хешем в имени кэшируются навсегда.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    statobj = os.stat(fullpath)
+    etag = f'"{int(statobj.st_mtime):x}-{statobj.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(statobj.st_mtime)
+    )
+    if response is None and settings.MEDIA_SENDFILE:
+        response = offload_response(path, fullpath)
+    if response is None:
+        response = range_response(
+            request, fullpath, statobj.st_size, etag, statobj.st_mtime
+        )
+    if response is None:
+        response = FileResponse(open(fullpath, 'rb'))
+    if response.status_code in (200, 206):
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(statobj.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if is_content_named(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = MEDIA_CACHE_CONTROL
+    return response
@@ -1,13 +1,108 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.forms.models import BaseInlineFormSet
 
-from .models import Comment, Group, Post, Follow
+from core.paginator import EstimatedCountPaginator
+
+from . import bulk
+from .models import Comment, Group, Post, Follow, User
+
+INLINE_PAGE_PARAM = 'comments_page'
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Формсет, который показывает только одну страницу объектов."""
+
+    per_page = 20
+    page = 1
+
+    def get_queryset(self):
+        if not hasattr(self, '_page_queryset'):
+            queryset = super().get_queryset()
+            self.total = queryset.count()
+            start = (self.page - 1) * self.per_page
+            self._page_queryset = queryset[start:start + self.per_page]
+        return self._page_queryset
+
+    def page_range(self):
+        return range(1, (self.total - 1) // self.per_page + 2)
 
 
 class CommentInLine(admin.TabularInline):
     model = Comment
+    formset = PaginatedInlineFormSet
+    template = 'admin/posts/paginated_tabular.html'
+    autocomplete_fields = ('author',)
+    ordering = ('-created',)
+    extra = 1
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            page = max(int(request.GET.get(INLINE_PAGE_PARAM, 1)), 1)
+        except ValueError:
+            page = 1
+        return type(formset.__name__, (formset,), {
+            'page': page, 'page_param': INLINE_PAGE_PARAM,
+        })
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без полного подсчета строк для больших таблиц."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class AuthorActionForm(ActionForm):
+    author = forms.CharField(
+        required=False, label='Новый автор (username)',
+    )
+
+
+class PostActionForm(AuthorActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+    )
+
+
+class BulkActionsAdmin(LargeTableAdmin):
+    """Массовые действия одним UPDATE/DELETE на пакет строк.
+
+    Стандартное delete_selected загружает все объекты со связями
+    и удаляет их по одному, поэтому оно отключено.
+    """
 
+    action_form = AuthorActionForm
 
-class PostAdmin(admin.ModelAdmin):
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def action_author(self, request):
+        username = request.POST.get('author', '').strip()
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            self.message_user(
+                request, f'Пользователь «{username}» не найден.',
+                messages.ERROR,
+            )
+        return author
+
+    def report(self, request, verb, count):
+        self.message_user(
+            request, f'{verb}: {count}', messages.SUCCESS
+        )
+
+
+class PostAdmin(BulkActionsAdmin):
+    action_form = PostActionForm
+    actions = [
+        'move_to_group', 'remove_from_group', 'reassign_author',
+        'delete_posts',
+    ]
     inlines = [
         CommentInLine,
     ]
@@ -19,12 +114,85 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    empty_value_display = '-пусто-'
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Без этого выпадающий список групп в list_editable
+            # запрашивается из базы заново для каждой строки.
+            if not hasattr(request, '_group_choices'):
+                request._group_choices = list(iter(formfield.choices))
+            formfield.choices = request._group_choices
+        return formfield
+
+    def move_to_group(self, request, queryset):
+        group_id = request.POST.get('group')
+        group = Group.objects.filter(pk=group_id).first() if group_id else None
+        if group is None:
+            self.message_user(request, 'Выберите группу.', messages.ERROR)
+            return
+        self.report(request, f'Перенесено в «{group}»',
+                    bulk.move_posts(queryset, group))
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def remove_from_group(self, request, queryset):
+        self.report(request, 'Убрано из групп',
+                    bulk.move_posts(queryset, None))
+    remove_from_group.short_description = 'Убрать из группы'
+
+    def reassign_author(self, request, queryset):
+        author = self.action_author(request)
+        if author is not None:
+            self.report(request, f'Передано автору {author}',
+                        bulk.reassign_posts(queryset, author))
+    reassign_author.short_description = 'Передать посты другому автору'
+
+    def delete_posts(self, request, queryset):
+        self.report(request, 'Удалено постов', bulk.delete_posts(queryset))
+    delete_posts.short_description = 'Удалить посты (пакетно)'
+
+
+class CommentAdmin(BulkActionsAdmin):
+    actions = ['reassign_author', 'delete_comments']
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    raw_id_fields = ('author', 'post')
     empty_value_display = '-пусто-'
 
+    def reassign_author(self, request, queryset):
+        author = self.action_author(request)
+        if author is not None:
+            self.report(request, f'Передано автору {author}',
+                        bulk.reassign_comments(queryset, author))
+    reassign_author.short_description = 'Передать комментарии другому автору'
+
+    def delete_comments(self, request, queryset):
+        self.report(request, 'Удалено комментариев',
+                    bulk.delete_comments(queryset))
+    delete_comments.short_description = 'Удалить комментарии (пакетно)'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Follow)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,136 @@
+from django.core.cache import cache
+from django.db import router, transaction
+
+from core.caching import invalidate_shells
+
+from .group_stats import count_changes, update_group_stats
+from .lookups import author_posts_count_key, invalidate_posts
+from .media import release_images
+from .models import Comment, Post, PostViewDay
+
+BATCH_SIZE = 500
+# Поля постов, которые нужны delete_post_rows.
+POST_ROW_FIELDS = ('pk', 'image', 'author_id', 'group_id')
+
+
+def raw_delete(queryset):
+    # Удаление одним DELETE без сборщика Django: объекты не загружаются
+    # в память, а сигналы заменяет явный сброс кэшей после пакета.
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def chunks(queryset, batch_size=BATCH_SIZE, fields=('pk',)):
+    """Строки выборки пакетами по первичному ключу (первое поле fields).
+
+    Следующий пакет ищется по ключу после последнего, поэтому обход
+    не зависит от того, что с уже пройденными строками сделали.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk
+        )
+        batch = list(page.values_list(*fields)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def invalidate_authors_counts(author_ids):
+    cache.delete_many([
+        author_posts_count_key(author_id) for author_id in set(author_ids)
+    ])
+
+
+def delete_post_rows(batch):
+    """Удаляет пакет постов (POST_ROW_FIELDS) с комментариями.
+
+    Картинки могут быть общими с другими постами, поэтому они
+    освобождаются после коммита через release_images. Если процесс
+    прервется раньше, оставшиеся файлы соберет команда gc_media.
+    """
+    post_ids = [pk for pk, _, _, _ in batch]
+    images = [image for _, image, _, _ in batch]
+    with transaction.atomic():
+        raw_delete(Comment.objects.filter(post_id__in=post_ids))
+        raw_delete(PostViewDay.objects.filter(post_id__in=post_ids))
+        deleted = raw_delete(Post.objects.filter(pk__in=post_ids))
+        update_group_stats(count_changes(
+            removed=[(group_id, author_id)
+                     for _, _, author_id, group_id in batch]
+        ))
+    transaction.on_commit(lambda: release_images(images))
+    invalidate_posts(post_ids)
+    invalidate_authors_counts(author_id for _, _, author_id, _ in batch)
+    return deleted
+
+
+def delete_posts(queryset, batch_size=BATCH_SIZE):
+    deleted = 0
+    for batch in chunks(queryset, batch_size, POST_ROW_FIELDS):
+        deleted += delete_post_rows(batch)
+        invalidate_shells()
+    return deleted
+
+
+def move_posts(queryset, group, batch_size=BATCH_SIZE):
+    """Переносит посты в группу group (None - убрать из группы)."""
+    moved = 0
+    group_id = group.pk if group is not None else None
+    fields = ('pk', 'group_id', 'author_id')
+    for batch in chunks(queryset, batch_size, fields):
+        post_ids = [pk for pk, _, _ in batch]
+        with transaction.atomic():
+            moved += Post.objects.filter(pk__in=post_ids).update(group=group)
+            update_group_stats(count_changes(
+                removed=[(old, author_id) for _, old, author_id in batch],
+                added=[(group_id, author_id) for _, _, author_id in batch],
+            ))
+        invalidate_posts(post_ids)
+        invalidate_shells()
+    return moved
+
+
+def reassign_posts(queryset, author, batch_size=BATCH_SIZE):
+    reassigned = 0
+    fields = ('pk', 'author_id', 'group_id')
+    for batch in chunks(queryset, batch_size, fields):
+        post_ids = [pk for pk, _, _ in batch]
+        with transaction.atomic():
+            reassigned += Post.objects.filter(pk__in=post_ids).update(
+                author=author
+            )
+            update_group_stats(count_changes(
+                removed=[(group_id, old) for _, old, group_id in batch],
+                added=[(group_id, author.pk) for _, _, group_id in batch],
+            ))
+        invalidate_posts(post_ids)
+        invalidate_authors_counts(
+            [author.pk] + [author_id for _, author_id, _ in batch]
+        )
+        invalidate_shells()
+    return reassigned
+
+
+def delete_comments(queryset, batch_size=BATCH_SIZE):
+    deleted = 0
+    for batch in chunks(queryset, batch_size):
+        with transaction.atomic():
+            deleted += raw_delete(
+                Comment.objects.filter(pk__in=[pk for pk, in batch])
+            )
+        invalidate_shells()
+    return deleted
+
+
+def reassign_comments(queryset, author, batch_size=BATCH_SIZE):
+    reassigned = 0
+    for batch in chunks(queryset, batch_size):
+        with transaction.atomic():
+            reassigned += Comment.objects.filter(
+                pk__in=[pk for pk, in batch]
+            ).update(author=author)
+        invalidate_shells()
+    return reassigned
@@ -0,0 +1,8 @@
+from .following import get_follow_state
+
+
+def following(request):
+    """Добавляет подписки текущего пользователя в контекст шаблонов."""
+    return {
+        'following_authors': get_follow_state(request),
+    }
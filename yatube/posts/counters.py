@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.buffers import FlushBuffer
+
+from .lookups import invalidate_posts
+from .models import Post, PostViewDay
+from .trending import trend_tracker
+
+VIEW_DAYS_KEPT = 28
+MOST_VIEWED_CACHE_KEY = 'most_viewed:{days}:{limit}'
+MOST_VIEWED_TIMEOUT = 60 * 5
+
+
+def group_by_increment(counts):
+    """{прибавка: [pk, ...]} - одно UPDATE на каждую разную прибавку."""
+    grouped = defaultdict(list)
+    for pk, count in counts.items():
+        grouped[count].append(pk)
+    return grouped
+
+
+class ViewCounter(FlushBuffer):
+    """Буфер просмотров постов в памяти процесса.
+
+    record() только увеличивает счетчик в словаре; раз в
+    settings.VIEW_FLUSH_INTERVAL секунд фоновый поток переносит
+    накопленное в базу несколькими UPDATE ... SET views = views + n.
+    При остановке или падении процесса теряются просмотры не больше
+    чем за один интервал.
+    """
+
+    interval_setting = 'VIEW_FLUSH_INTERVAL'
+    thread_name = 'view-counter'
+
+    def __init__(self):
+        super().__init__()
+        self._pruned_day = None
+
+    def merge(self, old, new):
+        return old + new
+
+    def record(self, post_id):
+        self.add(post_id, 1)
+
+    def pending(self, post_id):
+        return super().pending(post_id, 0)
+
+    def save(self, counts):
+        """Переносит просмотры в базу, возвращает их число."""
+        counts = self._save(counts)
+        invalidate_posts(counts)
+        for post_id, views in counts.items():
+            trend_tracker.record('view', post_id, count=views)
+        return sum(counts.values())
+
+    def _save(self, counts):
+        today = timezone.localdate()
+        with transaction.atomic():
+            existing = set(Post.objects.filter(
+                pk__in=list(counts)
+            ).values_list('pk', flat=True))
+            counts = {pk: counts[pk] for pk in existing}
+            PostViewDay.objects.bulk_create(
+                [PostViewDay(post_id=pk, day=today) for pk in counts],
+                ignore_conflicts=True,
+            )
+            for increment, post_ids in group_by_increment(counts).items():
+                Post.objects.filter(pk__in=post_ids).update(
+                    views=F('views') + increment
+                )
+                PostViewDay.objects.filter(
+                    day=today, post_id__in=post_ids
+                ).update(views=F('views') + increment)
+            if self._pruned_day != today:
+                PostViewDay.objects.filter(
+                    day__lt=today - timedelta(days=VIEW_DAYS_KEPT)
+                ).delete()
+                self._pruned_day = today
+        return counts
+
+
+view_counter = ViewCounter()
+
+
+def counts_views(view):
+    """Учитывает успешный GET страницы поста, даже если она из кэша."""
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view(request, post_id, *args, **kwargs)
+        if request.method == 'GET' and response.status_code == 200:
+            view_counter.record(int(post_id))
+        return response
+    return wrapper
+
+
+def most_viewed(days=7, limit=10):
+    """Самые просматриваемые посты за последние days дней."""
+    key = MOST_VIEWED_CACHE_KEY.format(days=days, limit=limit)
+    ranking = cache.get(key)
+    if ranking is None:
+        since = timezone.localdate() - timedelta(days=days - 1)
+        ranking = list(
+            PostViewDay.objects.filter(day__gte=since).values(
+                'post'
+            ).annotate(total=Sum('views')).order_by(
+                '-total'
+            ).values_list('post', 'total')[:limit]
+        )
+        cache.set(key, ranking, MOST_VIEWED_TIMEOUT)
+    return ranking
@@ -0,0 +1,165 @@
+"""RSS и Atom ленты главной, групп и авторов.
+
+Не путать с posts.scroll: там фрагменты бесконечной прокрутки.
+"""
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.caching import cache_shell, get_shell_generation
+
+from .lookups import get_author, get_group
+from .models import Post
+from .shells import author_scopes, group_scopes, index_scopes
+from .views import feed
+
+FEED_ITEMS = 20
+FEED_TITLE_LENGTH = 60
+FEED_TIMEOUT = 60 * 10
+FEED_STATE_KEY = 'feed_state:{name}:{args}:{generation}'
+
+
+def author_name(author):
+    return author.get_full_name() or author.username
+
+
+class PostsFeed(Feed):
+    """Последние FEED_ITEMS постов; вместо полного текста - его начало.
+
+    Объект ленты (группа или автор) отдает свои посты через related_name
+    posts, лента без объекта - посты всех авторов.
+    """
+
+    def posts(self, obj):
+        if obj is None:
+            return Post.objects.all()
+        return obj.posts.all()
+
+    def items(self, obj):
+        return feed(self.posts(obj))[:FEED_ITEMS]
+
+    def state(self, obj):
+        """Последний pk, число постов и время последней правки ленты."""
+        return self.posts(obj).aggregate(
+            last_pk=Max('pk'), count=Count('pk'), updated=Max('updated')
+        )
+
+    def item_title(self, post):
+        return Truncator(
+            f'{author_name(post.author)}: {post.excerpt}'
+        ).chars(FEED_TITLE_LENGTH)
+
+    def item_description(self, post):
+        return post.excerpt_html
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return author_name(post.author)
+
+
+class IndexFeed(PostsFeed):
+    title = 'Yatube: последние обновления'
+
+    def description(self, obj):
+        return 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_group(slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description or f'Посты группы {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_author(username)
+
+    def title(self, author):
+        return f'Yatube: {author_name(author)}'
+
+    def description(self, author):
+        return f'Посты автора {author_name(author)}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class IndexAtomFeed(AtomMixin, IndexFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def syndicated(feed_view, name, scopes):
+    """Лента с кэшем отрисовки и ответами 304 на повторные опросы.
+
+    ETag и Last-Modified выводятся из состояния самой ленты (последний
+    пост, число постов, последняя правка), поэтому изменения в других
+    лентах их не меняют. Состояние кэшируется до изменения разделов
+    scopes (см. cache_shell): неизменная лента не делает запросов к базе.
+    """
+    def state(request, **kwargs):
+        key = FEED_STATE_KEY.format(
+            name=name, args=':'.join(map(str, kwargs.values())),
+            generation=get_shell_generation(*scopes(request, **kwargs)),
+        )
+        return cache.get_or_set(
+            key,
+            lambda: feed_view.state(feed_view.get_object(request, **kwargs)),
+            FEED_TIMEOUT,
+        )
+
+    def etag(request, **kwargs):
+        current = state(request, **kwargs)
+        updated = current['updated']
+        updated = updated.timestamp() if updated else 0
+        return f'{name}-{current["last_pk"]}-{current["count"]}-{updated}'
+
+    def last_modified(request, **kwargs):
+        return state(request, **kwargs)['updated']
+
+    view = cache_shell(
+        60, FEED_TIMEOUT, key_prefix=name, scopes=scopes
+    )(feed_view)
+    return condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+
+index_rss = syndicated(IndexFeed(), 'index_rss', index_scopes)
+index_atom = syndicated(IndexAtomFeed(), 'index_atom', index_scopes)
+group_rss = syndicated(GroupFeed(), 'group_rss', group_scopes)
+group_atom = syndicated(GroupAtomFeed(), 'group_atom', group_scopes)
+author_rss = syndicated(AuthorFeed(), 'author_rss', author_scopes)
+author_atom = syndicated(AuthorAtomFeed(), 'author_atom', author_scopes)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+
+from .models import Follow
+
+FOLLOWING_CACHE_TIMEOUT = 60 * 15
+
+
+def following_cache_key(user_id):
+    return f'following:{user_id}'
+
+
+def get_following_ids(user):
+    """Множество id авторов, на которых подписан пользователь."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = following_cache_key(user.pk)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+        cache.set(key, following_ids, FOLLOWING_CACHE_TIMEOUT)
+    return following_ids
+
+
+def invalidate_following(user_id):
+    cache.delete(following_cache_key(user_id))
+
+
+class FollowState:
+    """Подписки текущего пользователя, загружаемые одним запросом.
+
+    Поддерживает проверку `author in follow_state` как для объекта
+    пользователя, так и для его id.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._ids = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = get_following_ids(self.user)
+        return self._ids
+
+    def __contains__(self, author):
+        return getattr(author, 'pk', author) in self.ids
+
+
+def get_follow_state(request):
+    """Состояние подписок, общее для всех шаблонов одного запроса."""
+    if not hasattr(request, '_follow_state'):
+        request._follow_state = FollowState(request.user)
+    return request._follow_state
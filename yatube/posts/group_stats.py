@@ -0,0 +1,81 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Subquery, Sum,
+)
+from django.db.models.functions import Coalesce
+
+from .models import GroupAuthor, GroupStats, Post
+
+
+def count_changes(removed=(), added=()):
+    """Изменение числа постов по парам (group_id, author_id).
+
+    Пары без группы пропускаются, встречные изменения сокращаются:
+    правка поста без смены группы и автора ничего не меняет.
+    """
+    changes = Counter()
+    for key in removed:
+        if key[0] is not None:
+            changes[key] -= 1
+    for key in added:
+        if key[0] is not None:
+            changes[key] += 1
+    return {key: delta for key, delta in changes.items() if delta}
+
+
+def update_group_stats(changes):
+    """Применяет changes из count_changes к GroupAuthor и GroupStats.
+
+    Постов автора в группе хранится по строке GroupAuthor, поэтому
+    и число постов, и число авторов пересчитываются по маленькой
+    таблице, а в posts_post остается только поиск даты последнего
+    поста по индексу (group, -pub_date).
+    """
+    if not changes:
+        return
+    group_ids = {group_id for group_id, _ in changes}
+    by_delta = defaultdict(list)
+    for (group_id, author_id), delta in changes.items():
+        by_delta[group_id, delta].append(author_id)
+    with transaction.atomic():
+        GroupStats.objects.bulk_create(
+            [GroupStats(group_id=group_id) for group_id in group_ids],
+            ignore_conflicts=True,
+        )
+        GroupAuthor.objects.bulk_create(
+            [GroupAuthor(group_id=group_id, author_id=author_id)
+             for (group_id, author_id), delta in changes.items()
+             if delta > 0],
+            ignore_conflicts=True,
+        )
+        for (group_id, delta), author_ids in by_delta.items():
+            GroupAuthor.objects.filter(
+                group_id=group_id, author_id__in=author_ids
+            ).update(posts_count=F('posts_count') + delta)
+        GroupAuthor.objects.filter(
+            group_id__in=group_ids, posts_count=0
+        ).delete()
+        refresh_group_stats(group_ids)
+
+
+def refresh_group_stats(group_ids):
+    """Пересчитывает GroupStats групп group_ids одним UPDATE."""
+    authors = GroupAuthor.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group')
+    latest = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by('-pub_date').values('pub_date')[:1]
+    GroupStats.objects.filter(pk__in=list(group_ids)).update(
+        posts_count=Coalesce(Subquery(
+            authors.annotate(total=Sum('posts_count')).values('total'),
+            output_field=IntegerField(),
+        ), 0),
+        authors_count=Coalesce(Subquery(
+            authors.annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ), 0),
+        last_post=Subquery(latest),
+    )
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from core.caching import LRUCache, bump_version, get_versions
+
+from .models import Group, Post, User
+
+POST_CACHE_TIMEOUT = 60 * 15
+
+group_cache = LRUCache(maxsize=256, timeout=60 * 5)
+author_cache = LRUCache(maxsize=1024, timeout=60 * 5)
+
+
+def get_group(slug):
+    """Группа по slug из кэша процесса или из базы (404, если нет)."""
+    return group_cache.get_or_set(
+        slug, lambda: get_object_or_404(Group, slug=slug)
+    )
+
+
+def get_author(username):
+    """Пользователь по username из кэша процесса или из базы."""
+    return author_cache.get_or_set(
+        username, lambda: get_object_or_404(User, username=username)
+    )
+
+
+def post_cache_key(post_id):
+    return f'post:{post_id}'
+
+
+def author_version_key(author_id):
+    return f'author_version:{author_id}'
+
+
+def group_version_key(group_id):
+    return f'group_version:{group_id}'
+
+
+def related_versions(post):
+    """Версии автора и группы, с которыми пост попал в кэш."""
+    keys = [author_version_key(post.author_id)]
+    if post.group_id is not None:
+        keys.append(group_version_key(post.group_id))
+    return get_versions(keys)
+
+
+def author_posts_count_key(author_id):
+    return f'author_posts_count:{author_id}'
+
+
+def get_author_posts_count(author_id):
+    key = author_posts_count_key(author_id)
+    count = cache.get(key)
+    if count is None:
+        count = Post.objects.filter(author_id=author_id).count()
+        cache.set(key, count, POST_CACHE_TIMEOUT)
+    return count
+
+
+def get_post(post_id):
+    """Пост вместе с автором и группой из общего кэша или из базы.
+
+    Число постов автора хранится отдельно, чтобы новая запись автора
+    не сбрасывала кэш всех его постов. Изменение автора или группы
+    меняет их версию, и запись с прежней версией перечитывается.
+    Копия может отставать от базы (views, trend_score), поэтому только
+    для чтения: сохранять ее нельзя.
+    """
+    key = post_cache_key(post_id)
+    entry = cache.get(key)
+    if entry is not None and entry[1] == related_versions(entry[0]):
+        post = entry[0]
+    else:
+        post = get_object_or_404(
+            Post.objects.select_related('author', 'group'), pk=post_id
+        )
+        cache.set(key, (post, related_versions(post)), POST_CACHE_TIMEOUT)
+    post.author_posts_count = get_author_posts_count(post.author_id)
+    return post
+
+
+def invalidate_post(post):
+    cache.delete_many([
+        post_cache_key(post.pk), author_posts_count_key(post.author_id)
+    ])
+
+
+def invalidate_posts(post_ids):
+    cache.delete_many([post_cache_key(post_id) for post_id in post_ids])
+
+
+def invalidate_group(group):
+    group_cache.delete(group.slug)
+    group_cache.delete_matching(lambda cached: cached.pk == group.pk)
+    bump_version(group_version_key(group.pk))
+
+
+def invalidate_author(user):
+    author_cache.delete(user.username)
+    author_cache.delete_matching(lambda cached: cached.pk == user.pk)
+    bump_version(author_version_key(user.pk))
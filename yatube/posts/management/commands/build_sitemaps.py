@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import SHARD_SIZE, build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает карту сайта в SITEMAP_ROOT: индекс и шарды постов, '
+        'профилей и групп. Пересобираются только изменившиеся шарды, '
+        'поэтому команду можно часто запускать по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            help='Адрес сайта для ссылок (по умолчанию SITEMAP_BASE_URL).',
+        )
+        parser.add_argument(
+            '--shard-size', type=int, default=SHARD_SIZE,
+            help='Сколько адресов в одном шарде.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересобрать все шарды.',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt, total = build_sitemaps(
+            base_url=options['base_url'],
+            shard_size=options['shard_size'],
+            force=options['force'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано шардов: {rebuilt} из {total}'
+        ))
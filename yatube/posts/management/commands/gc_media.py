@@ -0,0 +1,65 @@
+import posixpath
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.media import is_fresh, referenced_images, release_images
+from posts.models import Post, post_image_storage
+
+GC_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов и их миниатюры, на которые больше не '
+        'ссылается ни один пост (например, после прерванной очистки).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько файлов будет удалено.',
+        )
+
+    def handle(self, *args, **options):
+        upload_to = Post._meta.get_field('image').upload_to
+        orphans = 0
+        released = 0
+        batch = []
+        for name in self.walk(upload_to.rstrip('/')):
+            batch.append(name)
+            if len(batch) >= GC_BATCH_SIZE:
+                orphans, released = self.collect(
+                    batch, options['dry_run'], orphans, released
+                )
+                batch = []
+        orphans, released = self.collect(
+            batch, options['dry_run'], orphans, released
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов без ссылок: {orphans}, удалено: {released}'
+        ))
+
+    def walk(self, directory):
+        try:
+            directories, files = post_image_storage.listdir(directory)
+        except FileNotFoundError:
+            return
+        for filename in files:
+            yield posixpath.join(directory, filename)
+        for subdirectory in directories:
+            yield from self.walk(posixpath.join(directory, subdirectory))
+
+    def collect(self, names, dry_run, orphans, released):
+        if not names:
+            return orphans, released
+        unreferenced = set(names) - referenced_images(names)
+        orphans += len(unreferenced)
+        if dry_run:
+            now = time.time()
+            released += sum(
+                1 for name in unreferenced if not is_fresh(name, now)
+            )
+        else:
+            released += release_images(unreferenced)
+        return orphans, released
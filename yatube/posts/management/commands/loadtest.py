@@ -0,0 +1,292 @@
+import multiprocessing
+import random
+import threading
+import time
+from collections import defaultdict
+from importlib import import_module
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+DEFAULT_MIX = (
+    'index=40,group=15,profile=15,post_detail=20,'
+    'follow_index=5,comment=3,post_create=2'
+)
+ENDPOINTS = (
+    'index', 'group', 'profile', 'post_detail',
+    'follow_index', 'comment', 'post_create',
+)
+LOGIN_REQUIRED = {'follow_index', 'comment', 'post_create'}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга для отсортированного списка."""
+    if not values:
+        return 0
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        try:
+            weights[name.strip()] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f'Неверный вес запроса: {item}')
+    return weights
+
+
+def anonymous_mix(weights):
+    """Смесь для анонимов: без запросов, требующих авторизации."""
+    return {
+        name: weight for name, weight in weights.items()
+        if name not in LOGIN_REQUIRED
+    }
+
+
+def check_mix(weights, who):
+    if not any(weight > 0 for weight in weights.values()):
+        raise CommandError(
+            f'В смеси нет запросов с положительным весом для {who} '
+            f'пользователей.'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: поднимает yatube.wsgi.application в локальном '
+        'многопоточном WSGI-сервере и гоняет смесь анонимных и '
+        'авторизованных запросов. Запросы comment и post_create пишут в '
+        'базу - запускайте на копии данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help=(
+            'Адрес уже запущенного сервера; без него сервер поднимается '
+            'локально.'
+        ))
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов сервера (каждый многопоточный).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=10,
+            help='Число одновременных виртуальных пользователей.',
+        )
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Длительность теста в секундах.')
+        parser.add_argument(
+            '--logged-in', type=float, default=0.3,
+            help='Доля авторизованных виртуальных пользователей.',
+        )
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=(
+            f'Веса запросов: {", ".join(ENDPOINTS)}.'
+        ))
+
+    def handle(self, *args, **options):
+        weights = parse_mix(options['mix'])
+        unknown = set(weights) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Неизвестные запросы: {", ".join(unknown)}')
+        self.load_sample_data()
+        sessions = self.create_sessions(options)
+        if sessions:
+            check_mix(weights, 'авторизованных')
+        if options['concurrency'] > len(sessions):
+            check_mix(anonymous_mix(weights), 'анонимных')
+
+        workers = []
+        base_url = options['url']
+        if not base_url:
+            base_url, workers = self.start_server(options)
+        self.base_url = base_url.rstrip('/')
+
+        self.stats = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+        threads = []
+        for number in range(options['concurrency']):
+            session_key = sessions[number] if number < len(sessions) else None
+            thread = threading.Thread(
+                target=self.virtual_user,
+                args=(session_key, weights, deadline),
+                daemon=True,
+            )
+            threads.append(thread)
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        for worker in workers:
+            worker.terminate()
+        self.report(elapsed)
+
+    def load_sample_data(self):
+        self.post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+        self.group_slugs = list(
+            Group.objects.values_list('slug', flat=True)[:100]
+        )
+        self.usernames = list(
+            User.objects.filter(posts__isnull=False).distinct().values_list(
+                'username', flat=True
+            )[:200]
+        )
+        if not self.post_ids:
+            raise CommandError('В базе нет постов для нагрузочного теста.')
+
+    def create_sessions(self, options):
+        """Сессии для авторизованных виртуальных пользователей."""
+        count = int(options['concurrency'] * options['logged_in'])
+        users = User.objects.filter(is_active=True).order_by('?')[:count]
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        sessions = []
+        for user in users:
+            session = session_store()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            sessions.append(session.session_key)
+        return sessions
+
+    def start_server(self, options):
+        from yatube.wsgi import application
+
+        server = make_server(
+            '127.0.0.1', options['port'], application,
+            server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+        )
+        workers = []
+        connections.close_all()
+        if options['processes'] > 1:
+            for _ in range(options['processes']):
+                worker = multiprocessing.Process(
+                    target=server.serve_forever, daemon=True
+                )
+                worker.start()
+                workers.append(worker)
+        else:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        self.stdout.write(
+            f'Сервер: http://{host}:{port}/, процессов: {options["processes"]}'
+        )
+        return f'http://{host}:{port}', workers
+
+    def virtual_user(self, session_key, weights, deadline):
+        http = requests.Session()
+        if session_key:
+            http.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+            # Получаем csrftoken для форм комментария и нового поста.
+            self.timed_request(
+                http, 'csrf', 'GET', reverse('posts:post_create'), None
+            )
+        else:
+            weights = anonymous_mix(weights)
+        names, values = list(weights), list(weights.values())
+        while time.monotonic() < deadline:
+            name = random.choices(names, values)[0]
+            self.timed_request(http, *self.build_request(name, http))
+
+    def timed_request(self, http, name, method, url, data):
+        """Выполняет запрос и записывает его задержку под именем name."""
+        started = time.monotonic()
+        try:
+            response = http.request(
+                method, self.base_url + url, data=data,
+                allow_redirects=False, timeout=30,
+            )
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        latency = (time.monotonic() - started) * 1000
+        with self.lock:
+            self.stats[name].append(latency)
+            if failed:
+                self.errors[name] += 1
+
+    def build_request(self, name, http):
+        """(имя, метод, адрес, данные) запроса name.
+
+        Если для group или profile нет данных, вместо них запрашивается
+        страница поста, и задержка учитывается как post_detail.
+        """
+        csrf = {'csrfmiddlewaretoken': http.cookies.get(
+            settings.CSRF_COOKIE_NAME, ''
+        )}
+        post_id = random.choice(self.post_ids)
+        if name == 'index':
+            page = random.choice((1, 1, 1, 2, 3))
+            url = f'{reverse("posts:index")}?page={page}'
+            return name, 'GET', url, None
+        if name == 'group' and self.group_slugs:
+            slug = random.choice(self.group_slugs)
+            url = reverse('posts:group_list', args=(slug,))
+            return name, 'GET', url, None
+        if name == 'profile' and self.usernames:
+            username = random.choice(self.usernames)
+            url = reverse('posts:profile', args=(username,))
+            return name, 'GET', url, None
+        if name == 'follow_index':
+            return name, 'GET', reverse('posts:follow_index'), None
+        if name == 'comment':
+            url = reverse('posts:add_comment', args=(post_id,))
+            return name, 'POST', url, {
+                'text': 'Комментарий нагрузочного теста', **csrf
+            }
+        if name == 'post_create':
+            return name, 'POST', reverse('posts:post_create'), {
+                'text': 'Пост нагрузочного теста', **csrf
+            }
+        url = reverse('posts:post_detail', args=(post_id,))
+        return 'post_detail', 'GET', url, None
+
+    def report(self, elapsed):
+        total = sum(len(latencies) for latencies in self.stats.values())
+        errors = sum(self.errors.values())
+        self.stdout.write(
+            f'Запросов: {total} за {elapsed:.1f} с, '
+            f'{total / elapsed:.1f} запр/с, ошибок: {errors}'
+        )
+        header = (
+            f'{"запрос":<14}{"кол-во":>8}{"ошибки":>8}{"ош.%":>7}'
+            f'{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}'
+        )
+        self.stdout.write(header)
+        for name in sorted(self.stats):
+            latencies = sorted(self.stats[name])
+            count = len(latencies)
+            self.stdout.write(
+                f'{name:<14}{count:>8}{self.errors[name]:>8}'
+                f'{self.errors[name] / count * 100:>7.1f}'
+                f'{percentile(latencies, 50):>9.1f}'
+                f'{percentile(latencies, 95):>9.1f}'
+                f'{percentile(latencies, 99):>9.1f}'
+                f'{latencies[-1]:>9.1f}'
+            )
+        self.stdout.write('Задержки в миллисекундах.')
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import User
+from posts.bulk import BATCH_SIZE
+from posts.purge import purge_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетное удаление пользователя со всеми комментариями, подписками, '
+        'постами и картинками. Прерванный запуск можно повторить.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пакетами в секундах.',
+        )
+        parser.add_argument(
+            '--keep-user', action='store_true',
+            help='Удалить только контент, оставив учетную запись.',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        totals = purge_user(
+            user,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            keep_user=options['keep_user'],
+            progress=self.report,
+        )
+        summary = ', '.join(f'{step}: {count}'
+                            for step, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Очистка {user.username} завершена ({summary})'
+        ))
+
+    def report(self, step, deleted):
+        if self.verbosity > 0:
+            self.stdout.write(f'{step}: удалено {deleted}')
@@ -0,0 +1,122 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.template import engines
+from django.test import Client
+from django.urls import URLPattern, get_resolver, reverse
+
+from posts.models import Group, User
+
+WARMUP_NAMESPACES = ('posts', 'users', 'about')
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогрев после деплоя: компиляция шаблонов, построение URL-резолверов '
+        'и заполнение кэша первыми страницами ленты, групп и профилей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц главной отрисовать.',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=10,
+            help='Сколько самых наполненных групп отрисовать.',
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=10,
+            help='Сколько профилей самых активных авторов отрисовать.',
+        )
+        parser.add_argument(
+            '--host', default=(settings.ALLOWED_HOSTS or ['localhost'])[0],
+            help='Host, под которым страницы попадут в кэш.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        templates = self.compile_templates()
+        self.stdout.write(f'Скомпилировано шаблонов: {templates}')
+        urls = self.resolve_urls()
+        self.stdout.write(f'Построено URL: {urls}')
+        pages = self.render_pages(options)
+        self.stdout.write(f'Отрисовано страниц: {pages}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев завершен за {time.monotonic() - started:.1f} с'
+        ))
+
+    def compile_templates(self):
+        compiled = 0
+        for engine in engines.all():
+            for directory in engine.template_dirs:
+                for root, _, files in os.walk(directory):
+                    for filename in files:
+                        if not filename.endswith(('.html', '.txt', '.xml')):
+                            continue
+                        name = os.path.relpath(
+                            os.path.join(root, filename), directory
+                        ).replace(os.sep, '/')
+                        try:
+                            engine.get_template(name)
+                        except Exception as error:
+                            self.stderr.write(f'Шаблон {name}: {error}')
+                        else:
+                            compiled += 1
+        return compiled
+
+    def resolve_urls(self):
+        resolver = get_resolver()
+        resolved = 0
+        for namespace in WARMUP_NAMESPACES:
+            _, namespace_resolver = resolver.namespace_dict[namespace]
+            for pattern in namespace_resolver.url_patterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                # Обращение к reverse_dict строит кэш резолвера, а reverse
+                # без аргументов прогревает маршруты статических страниц.
+                namespace_resolver.reverse_dict.getlist(pattern.name)
+                if not pattern.pattern.regex.groups:
+                    reverse(f'{namespace}:{pattern.name}')
+                resolved += 1
+        return resolved
+
+    def render_pages(self, options):
+        client = Client(HTTP_HOST=options['host'])
+        urls = [
+            f'{reverse("posts:index")}?page={page}'
+            for page in range(2, options['pages'] + 1)
+        ]
+        if options['pages'] > 0:
+            urls.insert(0, reverse('posts:index'))
+        groups = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').values_list('slug', flat=True)
+        urls += [
+            reverse('posts:group_list', kwargs={'slug': slug})
+            for slug in groups[:options['groups']]
+        ]
+        authors = User.objects.annotate(
+            posts_count=Count('posts')
+        ).filter(posts_count__gt=0).order_by(
+            '-posts_count'
+        ).values_list('username', flat=True)
+        urls += [
+            reverse('posts:profile', kwargs={'username': username})
+            for username in authors[:options['profiles']]
+        ]
+        rendered = 0
+        for url in urls:
+            try:
+                response = client.get(url)
+            except Exception as error:
+                self.stderr.write(f'{url}: {error}')
+                continue
+            if response.status_code == 200:
+                rendered += 1
+            else:
+                self.stderr.write(f'{url}: {response.status_code}')
+        return rendered
@@ -0,0 +1,45 @@
+import time
+
+from django.core.exceptions import SuspiciousFileOperation
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import Post, post_image_storage
+
+# Файл, который недавно загружали повторно, не удаляется: ссылающийся
+# на него пост может быть еще не сохранен.
+GC_GRACE_PERIOD = 60 * 60
+
+
+def referenced_images(names):
+    return set(
+        Post.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+
+
+def is_fresh(name, now):
+    modified = post_image_storage.get_modified_time(name).timestamp()
+    return now - modified < GC_GRACE_PERIOD
+
+
+def release_images(names):
+    """Удаляет картинки, на которые больше не ссылается ни один пост.
+
+    Вместе с картинкой удаляются ее миниатюры. Возвращает число
+    удаленных файлов; остальное соберет команда gc_media.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return 0
+    now = time.time()
+    released = 0
+    for name in names - referenced_images(names):
+        try:
+            if is_fresh(name, now):
+                continue
+        except (FileNotFoundError, SuspiciousFileOperation):
+            # Файла уже нет или путь указывает вне хранилища.
+            continue
+        delete_with_thumbnails(ImageFile(name, post_image_storage))
+        released += 1
+    return released
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:29
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import migrations, models
+
+from core.images import describe_image
+
+BATCH_SIZE = 100
+IMAGE_META_FIELDS = (
+    'image_width', 'image_height', 'image_color', 'image_placeholder',
+)
+
+
+def fill_image_meta(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').only('image').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            return
+        for post in batch:
+            try:
+                with post.image.open('rb') as file:
+                    (post.image_width, post.image_height, post.image_color,
+                     post.image_placeholder) = describe_image(file)
+            except (OSError, SuspiciousFileOperation):
+                continue
+        Post.objects.bulk_update(batch, IMAGE_META_FIELDS)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_image_meta, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_image_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='просмотры'),
+        ),
+        migrations.CreateModel(
+            name='PostViewDay',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_days', to='posts.Post')),
+            ],
+            options={
+                'unique_together': {('post', 'day')},
+            },
+        ),
+    ]
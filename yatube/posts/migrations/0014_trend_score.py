@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='trend_score',
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trend_score',
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+    ]
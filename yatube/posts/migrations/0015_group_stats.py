@@ -0,0 +1,87 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupAuthor = apps.get_model('posts', 'GroupAuthor')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(group__isnull=False).order_by()
+    GroupAuthor.objects.bulk_create(
+        (GroupAuthor(group_id=row['group'], author_id=row['author'],
+                     posts_count=row['total'])
+         for row in posts.values('group', 'author').annotate(
+             total=models.Count('pk')
+        ).iterator()),
+        batch_size=BATCH_SIZE,
+    )
+    totals = {
+        row['group']: row
+        for row in posts.values('group').annotate(
+            total=models.Count('pk'),
+            authors=models.Count('author', distinct=True),
+            last=models.Max('pub_date'),
+        )
+    }
+    stats = []
+    for group_id in Group.objects.values_list('pk', flat=True).iterator():
+        row = totals.get(group_id, {})
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=row.get('total', 0),
+            authors_count=row.get('authors', 0),
+            last_post=row.get('last'),
+        ))
+    GroupStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_trend_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('posts_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='постов')),
+                ('authors_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='авторов')),
+                ('last_post', models.DateTimeField(db_index=True, null=True, verbose_name='последний пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupauthor',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_counts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='groupauthor',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_counts', to='posts.Group'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='groupauthor',
+            unique_together={('group', 'author')},
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,36 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from core.images import describe_image
+from core.storage import ContentAddressedStorage
 
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 300
+EXCERPT_FIELDS = ('excerpt', 'excerpt_html')
+IMAGE_META_FIELDS = (
+    'image_width', 'image_height', 'image_color', 'image_placeholder',
+)
+
+# Одинаковые картинки хранятся одним файлом, их миниатюры тоже общие.
+post_image_storage = ContentAddressedStorage()
+
+
+def make_excerpt(text):
+    """Начало текста для лент и его готовый HTML."""
+    excerpt = Truncator(text).chars(EXCERPT_LENGTH)
+    return excerpt, linebreaksbr(excerpt, autoescape=True)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField(null=True, blank=True)
+    # Сумма оценок постов группы, см. posts.trending.
+    trend_score = models.FloatField(null=True, editable=False, db_index=True)
 
     def __str__(self):
         return self.title
@@ -18,7 +40,9 @@ class Post(models.Model):
     text = models.TextField(verbose_name='текст',
                             help_text='Текст нового комментария',
                             )
-    pub_date = models.DateTimeField(auto_now_add=True)
+    pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Время последнего сохранения: по нему карта сайта видит правки.
+    updated = models.DateTimeField(auto_now=True)
     group = models.ForeignKey(
         Group,
         blank=True,
@@ -36,17 +60,109 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        blank=True,
+        db_index=True,
+        storage=post_image_storage,
     )
+    # Считаются один раз при загрузке, чтобы шаблоны не читали файл.
+    # width_field/height_field не используются: они открывают файл при
+    # создании объекта, если размеры еще не заполнены.
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+    # Накапливается в памяти процесса и сбрасывается пакетами,
+    # см. posts.counters.
+    views = models.PositiveIntegerField('просмотры', default=0,
+                                        editable=False)
+    # Логарифм затухающей суммы событий поста, см. posts.trending.
+    trend_score = models.FloatField(null=True, editable=False, db_index=True)
+    # Ленты показывают только начало поста и не загружают text целиком.
+    excerpt = models.TextField('начало текста', blank=True, editable=False)
+    excerpt_html = models.TextField(blank=True, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Лента группы и дата ее последнего поста, см. posts.group_stats.
+        indexes = [models.Index(fields=['group', '-pub_date'],
+                                name='post_group_pub_date_idx')]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt, self.excerpt_html = make_excerpt(self.text)
+            if update_fields is not None:
+                update_fields = set(update_fields) | set(EXCERPT_FIELDS)
+        if update_fields is None or 'image' in update_fields:
+            self.update_image_meta()
+            if update_fields is not None:
+                update_fields = set(update_fields) | set(IMAGE_META_FIELDS)
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def update_image_meta(self):
+        if not self.image:
+            self.image_width = self.image_height = None
+            self.image_color = self.image_placeholder = ''
+        elif not self.image._committed:
+            # Новая загрузка: файл еще в памяти или во временном файле.
+            (self.image_width, self.image_height, self.image_color,
+             self.image_placeholder) = describe_image(self.image.file)
+
+
+class GroupStats(models.Model):
+    """Счетчики группы для каталога, обновляются вместе с постами."""
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('постов', default=0,
+                                              db_index=True)
+    authors_count = models.PositiveIntegerField('авторов', default=0,
+                                                db_index=True)
+    last_post = models.DateTimeField('последний пост', null=True,
+                                     db_index=True)
+
+
+class GroupAuthor(models.Model):
+    """Сколько постов автора в группе: из них считается число авторов."""
+
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_counts',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_counts',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('group', 'author')
+
+
+class PostViewDay(models.Model):
+    """Просмотры поста за день, для подборки популярного за неделю."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='view_days',
+    )
+    day = models.DateField(db_index=True)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'day')
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -75,7 +191,3 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
-    User.add_to_class('follow',
-                      models.ManyToManyField('self',
-                                             related_name='relationship',
-                                             symmetrical=False))
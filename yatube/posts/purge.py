@@ -0,0 +1,76 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.caching import invalidate_shells
+
+from .bulk import (
+    BATCH_SIZE, POST_ROW_FIELDS, chunks, delete_post_rows,
+    invalidate_authors_counts, raw_delete,
+)
+from .following import invalidate_following
+from .lookups import invalidate_author
+from .models import Comment, Follow, Post
+
+
+def _purge_comments(user, batch_size, pause):
+    for batch in chunks(Comment.objects.filter(author=user), batch_size):
+        with transaction.atomic():
+            deleted = raw_delete(
+                Comment.objects.filter(pk__in=[pk for pk, in batch])
+            )
+        yield deleted
+        time.sleep(pause)
+
+
+def _purge_follows(user, batch_size, pause):
+    edges = Follow.objects.filter(Q(user=user) | Q(author=user))
+    for batch in chunks(edges, batch_size, ('pk', 'user_id')):
+        with transaction.atomic():
+            deleted = raw_delete(
+                Follow.objects.filter(pk__in=[pk for pk, _ in batch])
+            )
+        for follower_id in {follower_id for _, follower_id in batch}:
+            invalidate_following(follower_id)
+        yield deleted
+        time.sleep(pause)
+
+
+def _purge_posts(user, batch_size, pause):
+    posts = Post.objects.filter(author=user)
+    for batch in chunks(posts, batch_size, POST_ROW_FIELDS):
+        yield delete_post_rows(batch)
+        time.sleep(pause)
+
+
+PURGE_STEPS = (
+    ('comments', _purge_comments),
+    ('follows', _purge_follows),
+    ('posts', _purge_posts),
+)
+
+
+def purge_user(user, batch_size=BATCH_SIZE, pause=0, keep_user=False,
+               progress=None):
+    """Пакетное удаление комментариев, подписок, постов и картинок автора.
+
+    Каждый пакет удаляется в своей короткой транзакции, между пакетами
+    можно сделать паузу pause, чтобы не держать блокировку SQLite.
+    progress(step, deleted) вызывается после каждого пакета.
+    Возвращает число удаленных строк по шагам.
+    """
+    totals = {}
+    for step, purge in PURGE_STEPS:
+        totals[step] = 0
+        for deleted in purge(user, batch_size, pause):
+            totals[step] += deleted
+            if progress is not None:
+                progress(step, totals[step])
+    invalidate_authors_counts([user.pk])
+    invalidate_following(user.pk)
+    invalidate_author(user)
+    invalidate_shells()
+    if not keep_user:
+        user.delete()
+    return totals
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+
+FEED_PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc if settings.USE_TZ else None)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def make_cursor(post):
+    """Позиция в ленте после post: время публикации в мкс и pk."""
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.pk}'
+
+
+def parse_cursor(cursor):
+    try:
+        micros, pk = (int(part) for part in cursor.split('_'))
+        # Слишком большое число не помещается в timedelta или datetime.
+        return EPOCH + micros * MICROSECOND, pk
+    except (ValueError, OverflowError):
+        raise Http404('Некорректный курсор ленты')
+
+
+def after_cursor(posts, cursor):
+    pub_date, pk = parse_cursor(cursor)
+    return posts.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+    )
+
+
+def feed_url(url_name, url_kwargs, cursor, json=False):
+    params = {'cursor': cursor}
+    if json:
+        params['format'] = 'json'
+    return f'{reverse(url_name, kwargs=url_kwargs)}?{urlencode(params)}'
+
+
+def next_feed_url(page_obj, url_name, url_kwargs=None):
+    """Фрагмент ленты, продолжающий обычную страницу page_obj."""
+    if not page_obj.has_next():
+        return None
+    return feed_url(url_name, url_kwargs or {}, make_cursor(page_obj[-1]))
+
+
+def post_as_json(post):
+    data = {
+        'id': post.pk,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+        'pub_date': post.pub_date.isoformat(),
+        'author': {
+            'username': post.author.username,
+            'full_name': post.author.get_full_name(),
+        },
+        'group': None,
+        'excerpt': post.excerpt,
+        'excerpt_html': post.excerpt_html,
+        'image': None,
+    }
+    if post.group_id:
+        data['group'] = {'slug': post.group.slug, 'title': post.group.title}
+    if post.image:
+        data['image'] = {
+            'url': post.image.url,
+            'width': post.image_width,
+            'height': post.image_height,
+            'color': post.image_color,
+            'placeholder': post.image_placeholder,
+        }
+    return data
+
+
+def feed_page(request, posts, url_name, url_kwargs=None):
+    """Следующие FEED_PAGE_SIZE постов после ?cursor= без разметки
+    страницы: HTML-фрагмент или JSON при ?format=json.
+
+    posts должны быть подготовлены для ленты (см. views.feed).
+    """
+    posts = posts.order_by('-pub_date', '-pk')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        posts = after_cursor(posts, cursor)
+    page = list(posts[:FEED_PAGE_SIZE + 1])
+    as_json = request.GET.get('format') == 'json'
+    next_url = None
+    if len(page) > FEED_PAGE_SIZE:
+        page = page[:FEED_PAGE_SIZE]
+        next_url = feed_url(
+            url_name, url_kwargs or {}, make_cursor(page[-1]), as_json
+        )
+    if as_json:
+        response = JsonResponse({
+            'posts': [post_as_json(post) for post in page],
+            'next': next_url,
+        })
+    else:
+        response = render(request, 'includes/feed_page.html', {
+            'posts': page, 'next_url': next_url,
+        })
+    if next_url:
+        response['Link'] = f'<{next_url}>; rel="next"'
+    return response
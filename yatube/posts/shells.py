@@ -0,0 +1,38 @@
+"""Разделы оболочек страниц постов (см. core.caching.cache_shell).
+
+index - главная, ее лента, популярное и трендовое; groups - каталог
+групп; group:<pk>, author:<pk> и post:<pk> - страницы группы, автора
+и поста вместе с их лентами.
+"""
+from core.caching import invalidate_shells
+
+from .lookups import get_author, get_group
+
+
+def index_scopes(request, *args, **kwargs):
+    return ['index']
+
+
+def groups_scopes(request, *args, **kwargs):
+    return ['groups']
+
+
+def group_scopes(request, slug):
+    return [f'group:{get_group(slug).pk}']
+
+
+def author_scopes(request, username):
+    return [f'author:{get_author(username).pk}']
+
+
+def post_scopes(request, post_id):
+    return [f'post:{post_id}']
+
+
+def invalidate_post_shells(post_id, group_ids=(), author_ids=()):
+    """Сбрасывает оболочки, на которых виден пост."""
+    invalidate_shells(
+        'index', 'groups', f'post:{post_id}',
+        *{f'group:{pk}' for pk in group_ids if pk},
+        *{f'author:{pk}' for pk in author_ids if pk},
+    )
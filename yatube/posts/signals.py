@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from core.caching import invalidate_shells
+
+from .following import invalidate_following
+from .group_stats import count_changes, update_group_stats
+from .lookups import invalidate_author, invalidate_group, invalidate_post
+from .media import release_images
+from .models import Comment, Follow, Group, GroupStats, Post, User
+from .shells import invalidate_post_shells
+from .trending import trend_tracker
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_following(instance.user_id)
+
+
+# Версия группы меняется до удаления, пока посты еще ссылаются на нее.
+@receiver([post_save, pre_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    invalidate_group(instance)
+    invalidate_shells('groups', f'group:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login: страницы не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_author(instance)
+    invalidate_shells(f'author:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_post(instance)
+    saved = getattr(instance, '_saved_group', None) or (None, None)
+    invalidate_post_shells(
+        instance.pk,
+        group_ids=(instance.group_id, saved[0]),
+        author_ids=(instance.author_id, saved[1]),
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_stats_created(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+# Сохраненные картинка, группа и автор нужны, чтобы после сохранения
+# понять, что именно изменилось.
+@receiver(pre_save, sender=Post)
+def post_remember(sender, instance, **kwargs):
+    instance._saved_image = instance._saved_group = None
+    if instance.pk is None:
+        return
+    saved = sender.objects.filter(pk=instance.pk).values_list(
+        'image', 'group_id', 'author_id'
+    ).first()
+    if saved is not None:
+        instance._saved_image = saved[0]
+        instance._saved_group = saved[1:]
+
+
+@receiver(post_save, sender=Post)
+def post_group_stats(sender, instance, **kwargs):
+    saved = getattr(instance, '_saved_group', None)
+    update_group_stats(count_changes(
+        removed=[saved] if saved else [],
+        added=[(instance.group_id, instance.author_id)],
+    ))
+
+
+@receiver(post_delete, sender=Post)
+def post_group_stats_deleted(sender, instance, **kwargs):
+    update_group_stats(count_changes(
+        removed=[(instance.group_id, instance.author_id)]
+    ))
+
+
+# Картинка может быть общей у нескольких постов, поэтому файл удаляется
+# только после коммита и только если на него больше никто не ссылается.
+
+
+@receiver(post_save, sender=Post)
+def post_image_replaced(sender, instance, **kwargs):
+    old_image = getattr(instance, '_saved_image', None)
+    if old_image and old_image != instance.image.name:
+        transaction.on_commit(lambda: release_images([old_image]))
+
+
+@receiver(post_delete, sender=Post)
+def post_image_released(sender, instance, **kwargs):
+    if instance.image:
+        image = instance.image.name
+        transaction.on_commit(lambda: release_images([image]))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_shells(f'post:{instance.post_id}')
+
+
+# Оценки только копятся в памяти: в базу их пишет фоновый сброс.
+@receiver(post_save, sender=Post)
+def post_trending(sender, instance, created, **kwargs):
+    if created:
+        trend_tracker.record('post', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_trending(sender, instance, created, **kwargs):
+    if created:
+        trend_tracker.record('comment', instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_trending(sender, instance, created, **kwargs):
+    if created:
+        trend_tracker.record_follow(instance.author_id)
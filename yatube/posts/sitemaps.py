@@ -0,0 +1,206 @@
+"""Карта сайта в статических файлах, разбитая на шарды.
+
+Объекты каждого раздела делятся на шарды по диапазонам pk, по
+SHARD_SIZE адресов в шарде (предел протокола sitemaps). Для каждого
+шарда считается отпечаток - число строк, сумма pk и время последнего
+изменения; перезаписываются только шарды, чей отпечаток изменился.
+"""
+import gzip
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Group, Post, User
+
+SHARD_SIZE = 50000
+INDEX_NAME = 'sitemap.xml'
+SHARDS_DIR = 'sitemaps'
+MANIFEST_NAME = 'manifest.json'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class Section:
+    """Раздел карты: объекты одной модели, поделенные по pk.
+
+    Подкласс задает модель и фильтр объектов, имя маршрута и поле для
+    его аргумента, а также поле с датой изменения, если она есть.
+    """
+
+    name = None
+    model = None
+    filters = {}
+    url_name = None
+    url_field = 'pk'
+    lastmod_field = None
+
+    def __init__(self):
+        fields = ('pk', self.url_field, self.lastmod_field)
+        self.fields = [field for field in dict.fromkeys(fields) if field]
+
+    def queryset(self):
+        return self.model.objects.filter(**self.filters)
+
+    def location(self, row):
+        value = row[self.fields.index(self.url_field)]
+        return reverse(self.url_name, args=[value])
+
+    def lastmod(self, row):
+        if self.lastmod_field is None:
+            return None
+        return row[self.fields.index(self.lastmod_field)]
+
+    def aggregates(self):
+        aggregates = {'count': Count('pk'), 'pk_sum': Sum('pk')}
+        if self.lastmod_field:
+            aggregates['updated'] = Max(self.lastmod_field)
+        return aggregates
+
+    def fingerprints(self, shard_size):
+        """{номер шарда: отпечаток} одним GROUP BY по всей таблице."""
+        rows = self.queryset().order_by().annotate(
+            shard=F('pk') / shard_size
+        ).values('shard').annotate(**self.aggregates())
+        return {
+            row.pop('shard'): json.dumps(row, sort_keys=True, default=str)
+            for row in rows
+        }
+
+    def rows(self, shard, shard_size):
+        return self.queryset().filter(
+            pk__gte=shard * shard_size, pk__lt=(shard + 1) * shard_size
+        ).order_by('pk').values_list(*self.fields).iterator()
+
+
+class PostsSection(Section):
+    name = 'posts'
+    model = Post
+    url_name = 'posts:post_detail'
+    lastmod_field = 'updated'
+
+
+class ProfilesSection(Section):
+    name = 'profiles'
+    model = User
+    filters = {'is_active': True}
+    url_name = 'posts:profile'
+    url_field = 'username'
+
+
+class GroupsSection(Section):
+    name = 'groups'
+    model = Group
+    url_name = 'posts:group_list'
+    url_field = 'slug'
+    lastmod_field = 'stats__last_post'
+
+
+SECTIONS = (PostsSection(), ProfilesSection(), GroupsSection())
+
+
+def w3c_date(value):
+    return value.isoformat(timespec='seconds')
+
+
+def write_file(path, content, compress=True):
+    """Атомарно записывает файл и его сжатую копию для static_serve."""
+    data = content.encode()
+    versions = [('', data)]
+    if compress:
+        versions.append(('.gz', gzip.compress(data)))
+    for suffix, payload in versions:
+        temp_path = f'{path}{suffix}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(payload)
+        os.replace(temp_path, path + suffix)
+
+
+def remove_file(path):
+    for suffix in ('', '.gz'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def render_urlset(entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             f'<urlset xmlns="{XMLNS}">']
+    for location, lastmod in entries:
+        lastmod = f'<lastmod>{w3c_date(lastmod)}</lastmod>' if lastmod else ''
+        lines.append(f'<url><loc>{escape(location)}</loc>{lastmod}</url>')
+    lines.append('</urlset>\n')
+    return '\n'.join(lines)
+
+
+def render_index(base_url, shards):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             f'<sitemapindex xmlns="{XMLNS}">']
+    for name, entry in sorted(shards.items()):
+        location = escape(f'{base_url}/{SHARDS_DIR}/{name}')
+        lines.append(f'<sitemap><loc>{location}</loc>'
+                     f'<lastmod>{entry["lastmod"]}</lastmod></sitemap>')
+    lines.append('</sitemapindex>\n')
+    return '\n'.join(lines)
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_shard(root, base_url, section, shard, shard_size):
+    name = f'{section.name}-{shard}.xml'
+    write_file(
+        os.path.join(root, SHARDS_DIR, name),
+        render_urlset(
+            (base_url + section.location(row), section.lastmod(row))
+            for row in section.rows(shard, shard_size)
+        ),
+    )
+
+
+def build_sitemaps(base_url=None, root=None, shard_size=SHARD_SIZE,
+                   force=False):
+    """Пересобирает изменившиеся шарды и индекс карты сайта.
+
+    Возвращает (число пересобранных шардов, число всех шардов).
+    """
+    base_url = (base_url or settings.SITEMAP_BASE_URL).rstrip('/')
+    root = root or settings.SITEMAP_ROOT
+    os.makedirs(os.path.join(root, SHARDS_DIR), exist_ok=True)
+    manifest = read_manifest(root)
+    settings_key = [base_url, shard_size]
+    previous = manifest.get('shards', {})
+    reusable = previous
+    if force or manifest.get('settings') != settings_key:
+        reusable = {}
+    shards = {}
+    rebuilt = 0
+    now = w3c_date(timezone.now())
+    for section in SECTIONS:
+        for shard, fingerprint in section.fingerprints(shard_size).items():
+            name = f'{section.name}-{shard}.xml'
+            entry = reusable.get(name)
+            path = os.path.join(root, SHARDS_DIR, name)
+            if (entry is None or entry['fingerprint'] != fingerprint
+                    or not os.path.exists(path)):
+                build_shard(root, base_url, section, shard, shard_size)
+                entry = {'fingerprint': fingerprint, 'lastmod': now}
+                rebuilt += 1
+            shards[name] = entry
+    for name in set(previous) - set(shards):
+        remove_file(os.path.join(root, SHARDS_DIR, name))
+    write_file(os.path.join(root, INDEX_NAME), render_index(base_url, shards))
+    write_file(os.path.join(root, MANIFEST_NAME), json.dumps({
+        'settings': settings_key,
+        'shards': shards,
+    }), compress=False)
+    return rebuilt, len(shards)
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(title=f'Группа {number}',
+                                 slug=f'group-{number}')
+            for number in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.admin, text='Пост',
+                                       group=cls.groups[0])
+        Post.objects.bulk_create([
+            Post(author=cls.admin, text=f'Пост {number}',
+                 group=cls.groups[number % 3])
+            for number in range(30)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.admin, text=f'Комментарий {n}')
+            for n in range(45)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        Post.objects.bulk_create([
+            Post(author=self.admin, text=f'Еще пост {number}',
+                 group=self.groups[number % 3])
+            for number in range(30)
+        ])
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(after), len(before))
+
+    def test_comment_inline_is_paginated(self):
+        url = reverse('admin:posts_post_change', args=[self.post.pk])
+        response = self.client.get(url)
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.initial_form_count(), 20)
+        self.assertContains(response, '?comments_page=3')
+        response = self.client.get(url, {'comments_page': 3})
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.initial_form_count(), 5)
+
+    def run_action(self, model, action, ids, **data):
+        url = reverse(f'admin:posts_{model}_changelist')
+        return self.client.post(url, {
+            'action': action, '_selected_action': ids, **data,
+        })
+
+    def test_move_to_group_action(self):
+        ids = list(Post.objects.filter(group=self.groups[1]).values_list(
+            'pk', flat=True
+        ))
+        self.run_action('post', 'move_to_group', ids,
+                        group=self.groups[2].pk)
+        self.assertFalse(Post.objects.filter(group=self.groups[1]).exists())
+        self.assertEqual(
+            Post.objects.filter(group=self.groups[2], pk__in=ids).count(),
+            len(ids),
+        )
+
+    def test_reassign_and_delete_actions(self):
+        other = User.objects.create_user(username='other')
+        self.run_action('comment', 'reassign_author',
+                        list(Comment.objects.values_list('pk', flat=True)),
+                        author='other')
+        self.assertEqual(Comment.objects.filter(author=other).count(), 45)
+        self.run_action('post', 'delete_posts', [self.post.pk])
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.objects.exists())
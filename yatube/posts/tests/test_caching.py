@@ -0,0 +1,173 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.caching import LRUCache, get_or_refresh, get_shell_generation
+from posts.lookups import (author_cache, get_author, get_group, get_post,
+                           group_cache, invalidate_author, invalidate_group)
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+    def test_expires_after_timeout(self):
+        lru = LRUCache(timeout=10)
+        with mock.patch('core.caching.time.monotonic', return_value=100):
+            lru.set('a', 1)
+        with mock.patch('core.caching.time.monotonic', return_value=111):
+            self.assertIsNone(lru.get('a'))
+
+
+class GetOrRefreshTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.build = mock.Mock(return_value='новое')
+
+    def test_fresh_value_is_not_rebuilt(self):
+        cache.set('key', ('старое', time.time() + 60, 0, None))
+        self.assertEqual(get_or_refresh('key', self.build, 20, 60), 'старое')
+        self.build.assert_not_called()
+
+    def test_stale_value_served_while_locked(self):
+        cache.set('key', ('старое', time.time() - 1, 0, None))
+        cache.add('key:lock', 1)
+        self.assertEqual(get_or_refresh('key', self.build, 20, 60), 'старое')
+        self.build.assert_not_called()
+
+    def test_stale_value_refreshed_by_lock_owner(self):
+        cache.set('key', ('старое', time.time() - 1, 0, None))
+        self.assertEqual(get_or_refresh('key', self.build, 20, 60), 'новое')
+        self.assertEqual(cache.get('key')[0], 'новое')
+        self.assertIsNone(cache.get('key:lock'))
+
+
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        group_cache.clear()
+        author_cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='cached')
+        self.user = User.objects.create_user(username='cached')
+
+    def test_lookups_hit_database_once(self):
+        get_group('cached')
+        get_author('cached')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group('cached'), self.group)
+            self.assertEqual(get_author('cached'), self.user)
+
+    def test_save_invalidates_lookups(self):
+        get_group('cached')
+        get_author('cached')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(get_group('cached').title, 'Новое название')
+        self.assertEqual(get_author('renamed'), self.user)
+        self.assertEqual(len(author_cache), 1)
+
+
+class PostCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Группа', slug='cached')
+        self.post = Post.objects.create(author=self.user, group=self.group,
+                                        text='Тестовая пост')
+
+    def test_post_cached_with_related_objects(self):
+        get_post(self.post.pk)
+        with self.assertNumQueries(0):
+            post = get_post(self.post.pk)
+            self.assertEqual(post.group.title, 'Группа')
+            self.assertEqual(post.author.username, 'auth')
+            self.assertEqual(post.author_posts_count, 1)
+
+    def test_post_group_and_author_changes_invalidate(self):
+        get_post(self.post.pk)
+        self.post.text = 'Измененный пост'
+        self.post.save()
+        self.assertEqual(get_post(self.post.pk).text, 'Измененный пост')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(get_post(self.post.pk).group.title, 'Новое название')
+        Post.objects.create(author=self.user, text='Второй пост')
+        self.assertEqual(get_post(self.post.pk).author_posts_count, 2)
+
+    def test_author_and_group_invalidation_skip_posts(self):
+        get_post(self.post.pk)
+        with self.assertNumQueries(0):
+            invalidate_author(self.user)
+            invalidate_group(self.group)
+        User.objects.filter(pk=self.user.pk).update(first_name='Имя')
+        invalidate_author(self.user)
+        self.assertEqual(get_post(self.post.pk).author.first_name, 'Имя')
+
+
+class ShellCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=cls.author, text='Тестовая пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_shell_shared_between_users(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Пользователь: author')
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        ))
+
+    def test_content_change_refreshes_shell(self):
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_anonymous_shell_is_publicly_cacheable(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('max-age=20', response['Cache-Control'])
+        self.assertNotIn('private', response['Cache-Control'])
+
+    def test_comment_refreshes_only_its_post_shells(self):
+        post = Post.objects.get(text='Тестовая пост')
+        index = get_shell_generation('index')
+        post_page = get_shell_generation(f'post:{post.pk}')
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        self.assertEqual(get_shell_generation('index'), index)
+        self.assertNotEqual(
+            get_shell_generation(f'post:{post.pk}'), post_page
+        )
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertNotEqual(get_shell_generation('index'), index)
+
+    def test_hole_values_must_be_primitive(self):
+        source = "{% load holes %}{% hole 'includes/switcher.html' a=author %}"
+        with self.assertRaises(TemplateSyntaxError):
+            Template(source).render(Context({'author': self.author}))
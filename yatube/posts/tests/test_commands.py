@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from io import StringIO
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.management.commands.loadtest import (
+    Command, parse_mix, percentile,
+)
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9'
+    b'\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00'
+    b'\x00\x02\x02\x4c\x01\x00\x3b'
+)
+
+
+class WarmupCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-slug')
+        Post.objects.create(author=cls.user, text='Тестовая пост',
+                            group=cls.group)
+
+    def test_warmup_renders_pages(self):
+        cache.clear()
+        out = StringIO()
+        call_command('warmup', pages=1, stdout=out, stderr=out)
+        output = out.getvalue()
+        self.assertIn('Отрисовано страниц: 3', output)
+        self.assertNotIn('Шаблон', output)
+
+    @override_settings(ALLOWED_HOSTS=[], DEBUG=True)
+    def test_warmup_without_allowed_hosts_uses_localhost(self):
+        cache.clear()
+        out = StringIO()
+        call_command('warmup', pages=1, stdout=out, stderr=out)
+        self.assertIn('Отрисовано страниц: 3', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PurgeUserCommandTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='spammer')
+        self.reader = User.objects.create_user(username='reader')
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.posts[0].image = SimpleUploadedFile(
+            'small.gif', SMALL_GIF, content_type='image/gif'
+        )
+        self.posts[0].save()
+        self.reader_post = Post.objects.create(author=self.reader,
+                                               text='Чужой пост')
+        Comment.objects.create(post=self.reader_post, author=self.user,
+                               text='Спам')
+        Comment.objects.create(post=self.posts[1], author=self.reader,
+                               text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.user)
+        Follow.objects.create(user=self.user, author=self.reader)
+
+    def test_purge_removes_user_and_content_in_batches(self):
+        image_path = self.posts[0].image.path
+        os.utime(image_path, (0, 0))
+        out = StringIO()
+        call_command('purge_user', 'spammer', batch_size=2, stdout=out)
+        self.assertFalse(User.objects.filter(username='spammer').exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(os.path.exists(image_path))
+        self.assertIn('posts: удалено 4', out.getvalue())
+        self.assertIn('posts: 5', out.getvalue())
+
+    def test_keep_user_purges_only_content(self):
+        call_command('purge_user', 'spammer', keep_user=True,
+                     stdout=StringIO())
+        self.assertTrue(User.objects.filter(username='spammer').exists())
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertEqual(Follow.objects.count(), 0)
+
+
+class LoadtestHelpersTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix('index=40, post_detail=2.5,group'),
+            {'index': 40, 'post_detail': 2.5, 'group': 1},
+        )
+        with self.assertRaises(CommandError):
+            parse_mix('index=много')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 50), 0)
+
+    def make_command(self):
+        command = Command()
+        command.base_url = 'http://127.0.0.1:9'
+        command.post_ids, command.group_slugs, command.usernames = [1], [], []
+        command.stats = defaultdict(list)
+        command.errors = defaultdict(int)
+        command.lock = threading.Lock()
+        return command
+
+    def test_fallback_is_recorded_as_post_detail(self):
+        command = self.make_command()
+        for name in ('group', 'profile'):
+            with self.subTest(name=name):
+                recorded, _, url, _ = command.build_request(
+                    name, requests.Session()
+                )
+                self.assertEqual(recorded, 'post_detail')
+                self.assertEqual(url, reverse('posts:post_detail', args=[1]))
+
+    def test_connection_error_on_first_request_is_counted(self):
+        command = self.make_command()
+        command.virtual_user('session', {'index': 1}, time.monotonic())
+        self.assertEqual(command.errors, {'csrf': 1})
+
+
+class LoadtestCommandTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=self.user, text='Тестовый пост')
+
+    def test_mix_without_anonymous_requests_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'анонимных'):
+            call_command(
+                'loadtest', mix='follow_index=1,comment=1', logged_in=0,
+                duration=0, stdout=StringIO(),
+            )
+
+    def test_short_run_against_local_server(self):
+        out = StringIO()
+        call_command(
+            'loadtest', mix='index=1,post_detail=1,follow_index=1',
+            concurrency=2, logged_in=0.5, duration=0.5, stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn('ошибок: 0', output)
+        for name in ('index', 'post_detail', 'follow_index'):
+            self.assertIn(f'\n{name} ', output)
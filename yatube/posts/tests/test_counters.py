@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import most_viewed, view_counter
+from posts.models import Post, PostViewDay
+
+User = get_user_model()
+
+
+@override_settings(VIEW_FLUSH_INTERVAL=0)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+
+    def test_views_are_buffered_until_flush(self):
+        url = reverse('posts:post_detail', args=[self.posts[0].pk])
+        for _ in range(3):
+            self.client.get(url)
+        self.assertEqual(view_counter.pending(self.posts[0].pk), 3)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+        self.assertEqual(view_counter.flush(), 3)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 3)
+        self.assertEqual(PostViewDay.objects.get().views, 3)
+
+    def test_most_viewed_this_week(self):
+        for post, views in zip(self.posts, (1, 5, 2)):
+            for _ in range(views):
+                view_counter.record(post.pk)
+        view_counter.record(10 ** 6)
+        view_counter.flush()
+        self.assertEqual(
+            most_viewed(),
+            [(self.posts[1].pk, 5), (self.posts[2].pk, 2),
+             (self.posts[0].pk, 1)],
+        )
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            [post.pk for post in response.context['posts']],
+            [self.posts[1].pk, self.posts[2].pk, self.posts[0].pk],
+        )
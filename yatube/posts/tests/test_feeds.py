@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.caching import invalidate_shells
+from posts.feeds import FEED_ITEMS
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.long_text = 'слово ' * 200
+        Post.objects.create(
+            author=cls.user, text=cls.long_text, group=cls.group
+        )
+        for number in range(FEED_ITEMS):
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_feed_is_limited(self):
+        response = self.client.get(reverse('posts:index_rss'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.count(b'<item>'), FEED_ITEMS)
+        self.assertContains(response, f'Пост {FEED_ITEMS - 1}')
+
+    def test_feed_has_excerpt_instead_of_text(self):
+        response = self.client.get(
+            reverse('posts:group_atom', args=[self.group.slug])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'слово слово')
+        self.assertNotContains(response, self.long_text.strip())
+
+    def test_author_feed_and_missing_group(self):
+        response = self.client.get(
+            reverse('posts:author_rss', args=[self.user.username])
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('posts:group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified(self):
+        url = reverse('posts:index_atom')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_etag_survives_unrelated_changes(self):
+        url = reverse('posts:group_rss', args=[self.group.slug])
+        response = self.client.get(url)
+        etag, modified = response['ETag'], response['Last-Modified']
+        invalidate_shells()
+        Group.objects.create(title='Другая', slug='other')
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=modified
+        )
+        self.assertEqual(response.status_code, 304)
+        post = self.group.posts.get()
+        post.text = 'Правка'
+        post.save()
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=modified
+        )
+        self.assertEqual(response.status_code, 200)
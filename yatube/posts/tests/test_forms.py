@@ -105,3 +105,16 @@ class PostFormCreateFormTests(TestCase):
         last_post = Post.objects.last()
         self.assertEqual(last_post.text, 'Измененный пост')
         self.assertEqual(last_post.group, self.post.group)
+
+    def test_edit_keeps_counters_updated_elsewhere(self):
+        """Правка не затирает просмотры, записанные в обход кэша поста."""
+        url = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        Post.objects.filter(pk=self.post.pk).update(views=5, trend_score=1.5)
+        self.authorized_client.post(url, data={'text': 'Правка'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Правка')
+        self.assertEqual(self.post.views, 5)
+        self.assertEqual(self.post.trend_score, 1.5)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.bulk import delete_posts, move_posts, reassign_posts
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.empty = Group.objects.create(title='Пустая', slug='empty')
+
+    def stats(self, group):
+        stats = GroupStats.objects.get(group=group)
+        return stats.posts_count, stats.authors_count, stats.last_post
+
+    def test_new_group_has_empty_stats(self):
+        self.assertEqual(self.stats(self.empty), (0, 0, None))
+
+    def test_stats_follow_post_changes(self):
+        first = Post.objects.create(
+            author=self.user, text='Первый', group=self.group
+        )
+        second = Post.objects.create(
+            author=self.other, text='Второй', group=self.group
+        )
+        self.assertEqual(self.stats(self.group), (2, 2, second.pub_date))
+        second.group = self.empty
+        second.save()
+        self.assertEqual(self.stats(self.group), (1, 1, first.pub_date))
+        self.assertEqual(self.stats(self.empty), (1, 1, second.pub_date))
+        first.text = 'Правка'
+        first.save()
+        self.assertEqual(self.stats(self.group), (1, 1, first.pub_date))
+        first.delete()
+        self.assertEqual(self.stats(self.group), (0, 0, None))
+
+    def test_bulk_operations_update_stats(self):
+        posts = [
+            Post.objects.create(
+                author=self.user, text=f'Пост {number}', group=self.group
+            )
+            for number in range(3)
+        ]
+        reassign_posts(Post.objects.filter(pk=posts[0].pk), self.other)
+        self.assertEqual(self.stats(self.group)[:2], (3, 2))
+        move_posts(Post.objects.filter(author=self.user), self.empty)
+        self.assertEqual(self.stats(self.group)[:2], (1, 1))
+        self.assertEqual(self.stats(self.empty)[:2], (2, 1))
+        delete_posts(Post.objects.all())
+        self.assertEqual(self.stats(self.group), (0, 0, None))
+        self.assertEqual(self.stats(self.empty), (0, 0, None))
+
+    def test_directory_does_not_query_posts(self):
+        cache.clear()
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:group_index'), {'sort': 'posts'}
+            )
+        self.assertNotIn(
+            'posts_post', ' '.join(query['sql'] for query in queries)
+        )
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.group, self.empty],
+        )
@@ -0,0 +1,39 @@
+from django.template.loader import get_template
+from django.test import SimpleTestCase
+
+from core.loaders import is_minified, minify_template
+
+
+class MinifyTemplateTests(SimpleTestCase):
+    def test_indentation_and_comments_removed(self):
+        source = (
+            '<ul>\n    <li>{{ post.text }}</li>\n\n\n'
+            '    <!-- комментарий -->\n  </ul>'
+        )
+        self.assertEqual(
+            minify_template(source), '<ul>\n<li>{{ post.text }}</li>\n</ul>'
+        )
+
+    def test_preformatted_blocks_preserved(self):
+        source = (
+            '<div>\n  <pre>\n    код\n  </pre>\n'
+            '  <textarea>\n  x</textarea>'
+        )
+        self.assertEqual(
+            minify_template(source),
+            '<div>\n<pre>\n    код\n  </pre>\n<textarea>\n  x</textarea>',
+        )
+
+    def test_project_templates_are_minified(self):
+        source = get_template('includes/footer.html').template.source
+        self.assertNotIn('\n  ', source)
+
+    def test_email_and_non_html_templates_are_untouched(self):
+        source = get_template(
+            'registration/password_reset_email.html'
+        ).template.source
+        self.assertIn('{% endblocktrans %}\n\n', source)
+        for name in ('registration/password_reset_subject.txt',
+                     'sitemaps/urlset.xml'):
+            self.assertFalse(is_minified(name))
+        self.assertTrue(is_minified('posts/index.html'))
@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings,
+)
+
+from core.images import describe_image
+from core.views import media_serve
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9'
+    b'\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00'
+    b'\x00\x02\x02\x4c\x01\x00\x3b'
+)
+
+
+def jpeg_bytes(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedImagesTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+
+    def create_post(self, name='meme.gif', content=SMALL_GIF):
+        return Post.objects.create(
+            author=self.user, text='Пост',
+            image=SimpleUploadedFile(name, content, content_type='image/gif'),
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w\w/\w\w/\w{64}\.gif$')
+
+    def test_image_meta_is_stored_on_upload(self):
+        post = Post.objects.get(pk=self.create_post().pk)
+        self.assertEqual((post.image_width, post.image_height), (1, 1))
+        self.assertRegex(post.image_color, r'^#[0-9a-f]{6}$')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        post.image = ''
+        post.save()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_image_tag_uses_stored_size(self):
+        post = self.create_post('wide.jpg', jpeg_bytes(1200, 400))
+        html = render_to_string('includes/post_image.html', {'post': post})
+        self.assertIn('width="1200" height="400"', html)
+        self.assertIn('data:image/jpeg;base64,', html)
+
+    def test_large_image_is_described_without_full_decode(self):
+        width, height, color, placeholder = describe_image(
+            BytesIO(jpeg_bytes(4000, 3000))
+        )
+        self.assertEqual((width, height), (4000, 3000))
+        self.assertRegex(color, r'^#f[0-9a-f]0000$')
+        self.assertTrue(placeholder.startswith('data:image/jpeg;base64,'))
+
+    def test_file_is_deleted_with_last_reference(self):
+        first = self.create_post()
+        second = self.create_post()
+        path = first.image.path
+        os.utime(path, (0, 0))
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_replaced_image_is_released(self):
+        post = self.create_post()
+        old_path = post.image.path
+        os.utime(old_path, (0, 0))
+        post.image = SimpleUploadedFile('new.gif', SMALL_GIF + b'\x00',
+                                        content_type='image/gif')
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(post.image.path))
+
+    def test_gc_media_removes_orphans(self):
+        post = self.create_post()
+        path = post.image.path
+        Post.objects.filter(pk=post.pk).update(image='')
+        os.utime(path, (0, 0))
+        out = StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertFalse(os.path.exists(path))
+        self.assertIn('удалено: 1', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE=None)
+class MediaServeTests(SimpleTestCase):
+    name = 'cache/ab/cd/' + 'a' * 32 + '.gif'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        path = os.path.join(TEMP_MEDIA_ROOT, cls.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(SMALL_GIF)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, path=None, **headers):
+        request = RequestFactory().get('/media/', **headers)
+        return media_serve(request, path or self.name)
+
+    def test_full_file_with_immutable_cache(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), SMALL_GIF)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_and_conditional_requests(self):
+        response = self.get(HTTP_RANGE='bytes=0-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'GIF89a')
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 0-5/{len(SMALL_GIF)}')
+        response = self.get(HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 416)
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_sendfile_offload(self):
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/' + self.name)
+        self.assertEqual(response.content, b'')
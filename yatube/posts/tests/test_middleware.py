@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.middleware import (
+    DEFAULT_STREAMING_COMPRESSION_LEVELS, CompressionMiddleware, brotli,
+    gzip_sequence,
+)
+
+HTML = '<p>Тестовая пост</p>\n' * 100
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def process(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_html_is_gzipped(self):
+        response = self.process(HttpResponse(HTML))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_brotli_preferred_when_accepted(self):
+        if brotli is None:
+            self.skipTest('brotli не установлен')
+        response = self.process(HttpResponse(HTML), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content).decode(), HTML)
+
+    def test_streaming_response_is_gzipped(self):
+        response = self.process(
+            StreamingHttpResponse(line for line in HTML.splitlines(True))
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content).decode(), HTML)
+
+    def test_small_and_binary_responses_are_skipped(self):
+        small = self.process(HttpResponse('<p>мало</p>'))
+        image = self.process(HttpResponse(b'\0' * 1000,
+                                          content_type='image/png'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+
+    def test_partial_and_error_responses_are_skipped(self):
+        partial = HttpResponse(HTML, status=206)
+        partial['Content-Range'] = f'bytes 0-{len(HTML) - 1}/{len(HTML)}'
+        not_found = HttpResponse(HTML, status=404)
+        for response in (partial, not_found):
+            response = self.process(response)
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_short_streaming_response_is_skipped(self):
+        response = StreamingHttpResponse(iter([b'<p>'] * 10))
+        response['Content-Length'] = '30'
+        response = self.process(response)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Length'], '30')
+
+    def test_streaming_static_uses_cheaper_level(self):
+        response = StreamingHttpResponse(
+            iter([HTML.encode()]), content_type='text/css'
+        )
+        with mock.patch('core.middleware.gzip_sequence',
+                        wraps=gzip_sequence) as spy:
+            response = self.process(response)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content).decode(), HTML)
+        self.assertEqual(
+            spy.call_args[0][1],
+            DEFAULT_STREAMING_COMPRESSION_LEVELS['gzip'],
+        )
+
+
+class TracingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.log = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        self.log.close()
+        self.addCleanup(os.remove, self.log.name)
+        cache.clear()
+
+    def read_traces(self):
+        with open(self.log.name, encoding='utf-8') as log:
+            return [json.loads(line) for line in log]
+
+    def test_unsampled_requests_are_not_logged(self):
+        with self.settings(TRACE_SAMPLE_RATE=0, TRACE_LOG=self.log.name):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(self.read_traces(), [])
+
+    def test_sampled_request_has_span_tree(self):
+        with self.settings(TRACE_SAMPLE_RATE=1, TRACE_LOG=self.log.name):
+            self.client.get(reverse('posts:index'))
+        [trace] = self.read_traces()
+        root = trace['span']
+        self.assertEqual(root['attrs']['path'], reverse('posts:index'))
+        self.assertEqual(root['attrs']['status'], 200)
+        kinds = set()
+        middleware = []
+        stack = [root]
+        while stack:
+            span = stack.pop()
+            kinds.add(span['kind'])
+            if span['kind'] == 'middleware':
+                middleware.append(span['attrs']['middleware'])
+            stack.extend(span['children'])
+        self.assertTrue({'view', 'sql', 'cache', 'template'} <= kinds)
+        self.assertEqual(middleware, [
+            'django.middleware.security.SecurityMiddleware',
+            'core.middleware.CompressionMiddleware',
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.common.CommonMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'django.middleware.clickjacking.XFrameOptionsMiddleware',
+            'core.middleware.TraceViewMiddleware',
+        ])
+        self.assertNotIn('get', caches['default'].__dict__)
@@ -32,3 +32,17 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         text = post.text[:15]
         self.assertEqual(text, str(text))
+
+    def test_excerpt_follows_text(self):
+        """Начало текста и его HTML обновляются при сохранении."""
+        post = Post.objects.create(author=self.user,
+                                   text='Первая <строка>\n' + 'а' * 400)
+        self.assertEqual(len(post.excerpt), 300)
+        self.assertTrue(post.excerpt_html.startswith(
+            'Первая &lt;строка&gt;<br>'
+        ))
+        post.text = 'Короткий текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Короткий текст')
+        self.assertEqual(post.excerpt_html, 'Короткий текст')
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Group, Post
+from posts.sitemaps import build_sitemaps
+
+User = get_user_model()
+SITEMAP_ROOT = tempfile.mkdtemp()
+BASE_URL = 'http://testserver'
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT, SITEMAP_BASE_URL=BASE_URL)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(5)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    def shard_path(self, post):
+        return os.path.join(
+            SITEMAP_ROOT, 'sitemaps', f'posts-{post.pk // 2}.xml'
+        )
+
+    def test_only_changed_shards_are_rebuilt(self):
+        rebuilt, total = build_sitemaps(shard_size=2)
+        self.assertEqual(rebuilt, total)
+        self.assertEqual(build_sitemaps(shard_size=2), (0, total))
+        post = self.posts[0]
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(build_sitemaps(shard_size=2), (1, total))
+        with open(self.shard_path(post)) as file:
+            self.assertIn(f'{BASE_URL}/posts/{post.pk}/', file.read())
+
+    def test_empty_shard_is_removed(self):
+        build_sitemaps(shard_size=2)
+        last = self.posts[-1]
+        path = self.shard_path(last)
+        self.assertTrue(os.path.exists(path))
+        Post.objects.filter(pk__gte=last.pk // 2 * 2).delete()
+        build_sitemaps(shard_size=2)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(path + '.gz'))
+
+    def test_index_is_served_as_static_file(self):
+        call_command('build_sitemaps', stdout=StringIO())
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        index = b''.join(response.streaming_content).decode()
+        for name in ('posts-0.xml', 'profiles-0.xml', 'groups-0.xml'):
+            self.assertIn(f'{BASE_URL}/sitemaps/{name}', index)
+        response = self.client.get('/sitemaps/groups-0.xml')
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(f'{BASE_URL}/group/{self.group.slug}/', content)
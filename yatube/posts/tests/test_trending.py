@@ -0,0 +1,74 @@
+import math
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import view_counter
+from posts.models import Comment, Follow, Group, Post
+from posts.trending import (
+    HALF_LIFE, event_score, trend_tracker, trending_groups, trending_post_ids,
+)
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_FLUSH_INTERVAL=0, VIEW_FLUSH_INTERVAL=0)
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+        trend_tracker.flush()
+        self.user = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        quiet = Group.objects.create(title='Тихая', slug='quiet')
+        busy = Group.objects.create(title='Шумная', slug='busy')
+        self.old = Post.objects.create(
+            author=self.user, text='Старый пост', group=busy
+        )
+        self.new = Post.objects.create(
+            author=self.user, text='Новый пост', group=quiet
+        )
+
+    def test_event_weight_halves_every_half_life(self):
+        self.assertAlmostEqual(
+            event_score(1, HALF_LIFE) - event_score(1, 0), math.log(2)
+        )
+
+    def test_events_are_buffered_until_flush(self):
+        Comment.objects.create(post=self.old, author=self.reader, text='!')
+        self.assertIsNotNone(trend_tracker.pending(('post', self.old.pk)))
+        self.old.refresh_from_db()
+        self.assertIsNone(self.old.trend_score)
+        self.assertEqual(trend_tracker.flush(), 2)
+        self.old.refresh_from_db()
+        self.old.group.refresh_from_db()
+        self.assertIsNotNone(self.old.trend_score)
+        self.assertEqual(self.old.trend_score, self.old.group.trend_score)
+
+    def test_comments_raise_post_and_its_group(self):
+        for _ in range(3):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text='!'
+            )
+        trend_tracker.flush()
+        self.assertEqual(trending_post_ids(), [self.old.pk, self.new.pk])
+        self.assertEqual(
+            trending_groups(), [('busy', 'Шумная'), ('quiet', 'Тихая')]
+        )
+
+    def test_follow_and_views_raise_latest_post(self):
+        Comment.objects.create(post=self.old, author=self.reader, text='!')
+        Follow.objects.create(user=self.reader, author=self.user)
+        for _ in range(20):
+            view_counter.record(self.new.pk)
+        view_counter.flush()
+        trend_tracker.flush()
+        self.assertEqual(trending_post_ids(), [self.new.pk, self.old.pk])
+
+    def test_trending_page(self):
+        trend_tracker.flush()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(len(response.context['posts']), 2)
+        self.assertContains(response, 'Группы в тренде')
@@ -9,6 +9,7 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from posts.models import Group, Post, Follow
+from posts.following import FollowState
 from posts.forms import PostForm
 
 User = get_user_model()
@@ -93,6 +94,13 @@ class PostUrlTests(TestCase):
         post_object = response.context['page_obj'][0]
         self.check_fields(post_object, self.post)
 
+    def test_feeds_do_not_load_full_text(self):
+        """Ленты загружают только начало текста поста."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        post_object = response.context['page_obj'][0]
+        self.assertEqual(post_object.get_deferred_fields(), {'text'})
+        self.assertContains(response, self.post.excerpt_html)
+
     def test_group_list_page_show_correct_context(self):
         """Шаблон group_list сформирован с правильным контекстом."""
         response = (self.authorized_client.
@@ -168,6 +176,34 @@ class PostUrlTests(TestCase):
         response = self.client.get(reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 0)
 
+    def test_uncached_pages_show_user_menu(self):
+        logout_url = reverse('users:logout')
+        for url in (reverse('posts:follow_index'),
+                    reverse('posts:post_create')):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, logout_url)
+                self.assertContains(response, 'Пользователь: auth')
+
+    def test_post_detail_has_comment_form(self):
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(
+            response, reverse('posts:add_comment', args=[self.post.pk])
+        )
+        self.assertNotContains(response, '{% hole')
+
+    def test_personal_pages_are_not_kept_by_browser(self):
+        url = reverse('posts:profile', args=[self.user.username])
+        response = self.authorized_author.get(url)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('max-age=0', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        response = self.authorized_author.get(url)
+        self.assertIn('max-age=0', response['Cache-Control'])
+
     def test_index_is_cached(self):
         post_cache = Post.objects.create(
             author=self.author,
@@ -209,6 +245,31 @@ class PostUrlTests(TestCase):
         )
         self.assertEqual(Follow.objects.count(), 0)
 
+    def test_profile_shows_following_state(self):
+        Follow.objects.create(author=self.user, user=self.author)
+        response = self.authorized_author.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        unfollow_url = reverse('posts:profile_unfollow',
+                               kwargs={'username': self.user.username})
+        self.assertContains(response, unfollow_url)
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertNotContains(response, unfollow_url)
+
+    def test_follow_state_uses_single_query(self):
+        writers = [
+            User.objects.create_user(username=f'writer{number}')
+            for number in range(5)
+        ]
+        for writer in writers[:3]:
+            Follow.objects.create(author=writer, user=self.author)
+        follow_state = FollowState(self.author)
+        with self.assertNumQueries(1):
+            followed = [writer in follow_state for writer in writers]
+        self.assertEqual(followed, [True, True, True, False, False])
+
     def test_follow_index_following(self):
         Follow.objects.create(author=self.user, user=self.author)
         response = self.authorized_author.get(reverse('posts:follow_index'))
@@ -232,6 +293,7 @@ class PaginatorViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_first_page_index_contains_ten_records(self):
         response = self.client.get(reverse('posts:index'))
@@ -260,3 +322,28 @@ class PaginatorViewsTest(TestCase):
                                    ('posts:profile',
                                     kwargs={'username': 'auth'}))
         self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_feed_fragments_continue_by_cursor(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'data-feed-next')
+        next_url = response.context['feed_url']
+        response = self.client.get(next_url)
+        self.assertNotContains(response, '<html')
+        self.assertEqual(len(response.context['posts']), 3)
+        self.assertNotIn('Link', response)
+        ids = [post.pk for post in response.context['posts']]
+        first_page = Post.objects.order_by('-pub_date', '-pk')[:10]
+        self.assertFalse(set(ids) & {post.pk for post in first_page})
+
+    def test_json_feed(self):
+        url = reverse('posts:group_feed', kwargs={'slug': 'test-slug'})
+        data = self.client.get(url, {'format': 'json'}).json()
+        self.assertEqual(len(data['posts']), 10)
+        self.assertEqual(data['posts'][0]['group']['slug'], 'test-slug')
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['posts']), 3)
+        self.assertIsNone(data['next'])
+        for cursor in ('oops', f'{10 ** 30}_1', f'{10 ** 18}_1'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,147 @@
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.buffers import FlushBuffer
+
+from .bulk import BATCH_SIZE
+from .models import Group, Post
+
+# Вклад события уменьшается вдвое за сутки.
+HALF_LIFE = 60 * 60 * 24
+DECAY = math.log(2) / HALF_LIFE
+# Все оценки хранятся приведенными к одному моменту (2020-01-01 UTC).
+EPOCH = 1577836800
+WEIGHTS = {
+    'post': 3.0,
+    'comment': 2.0,
+    'follow': 1.0,
+    'view': 0.1,
+}
+TRENDING_CACHE_KEY = 'trending:{kind}:{limit}'
+TRENDING_TIMEOUT = 60 * 5
+
+
+def logaddexp(a, b):
+    """log(e^a + e^b) без переполнения; None означает пустую сумму."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def event_score(weight, when=None):
+    """Логарифм вклада события, приведенного к EPOCH.
+
+    Событие веса w в момент t сейчас (в момент now) весит
+    w * e^(-DECAY * (now - t)). Множитель e^(-DECAY * (now - EPOCH))
+    общий для всех, поэтому для сравнения достаточно хранить
+    log(w) + DECAY * (t - EPOCH) и складывать такие оценки через
+    logaddexp: старые значения в базе пересчитывать не нужно.
+    """
+    when = time.time() if when is None else when
+    return math.log(weight) + DECAY * (when - EPOCH)
+
+
+class TrendTracker(FlushBuffer):
+    """Оценки популярности постов и групп, обновляемые по событиям.
+
+    Новые посты, комментарии, подписки и просмотры копятся в памяти;
+    раз в settings.TRENDING_FLUSH_INTERVAL секунд их сумма добавляется
+    к trend_score затронутых постов и их групп. Подписка на автора
+    поднимает его последний пост.
+    """
+
+    interval_setting = 'TRENDING_FLUSH_INTERVAL'
+    thread_name = 'trending'
+
+    def merge(self, old, new):
+        return logaddexp(old, new)
+
+    def record(self, event, post_id, count=1, when=None):
+        self.add(('post', post_id), event_score(WEIGHTS[event] * count, when))
+
+    def record_follow(self, author_id, when=None):
+        self.add(('author', author_id), event_score(WEIGHTS['follow'], when))
+
+    def save(self, items):
+        """Добавляет накопленные оценки в базу, возвращает число событий."""
+        scores = {}
+        for (kind, pk), score in items.items():
+            if kind == 'author':
+                pk = latest_post_id(pk)
+                if pk is None:
+                    continue
+            scores[pk] = logaddexp(scores.get(pk), score)
+        with transaction.atomic():
+            group_scores = add_scores(Post, scores, group_field='group')
+            add_scores(Group, group_scores)
+        return len(items)
+
+
+def latest_post_id(author_id):
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', flat=True).first()
+
+
+def add_scores(model, scores, group_field=None):
+    """Прибавляет scores к trend_score, возвращает прибавки для групп.
+
+    Строки блокируются в порядке pk: параллельные сбросы из разных
+    процессов не теряют оценки друг друга и не взаимоблокируются.
+    """
+    fields = ['pk', 'trend_score']
+    if group_field:
+        fields.append(group_field)
+    objects = list(
+        model.objects.select_for_update().filter(
+            pk__in=list(scores)
+        ).order_by('pk').only(*fields)
+    )
+    group_scores = {}
+    for obj in objects:
+        score = scores[obj.pk]
+        obj.trend_score = logaddexp(obj.trend_score, score)
+        group_id = group_field and getattr(obj, group_field + '_id')
+        if group_id:
+            group_scores[group_id] = logaddexp(
+                group_scores.get(group_id), score
+            )
+    model.objects.bulk_update(objects, ['trend_score'],
+                              batch_size=BATCH_SIZE)
+    return group_scores
+
+
+trend_tracker = TrendTracker()
+
+
+def trending_post_ids(limit=10):
+    """pk самых обсуждаемых сейчас постов, по убыванию оценки."""
+    key = TRENDING_CACHE_KEY.format(kind='posts', limit=limit)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            Post.objects.filter(trend_score__isnull=False).order_by(
+                '-trend_score'
+            ).values_list('pk', flat=True)[:limit]
+        )
+        cache.set(key, ids, TRENDING_TIMEOUT)
+    return ids
+
+
+def trending_groups(limit=5):
+    """(slug, title) самых активных сейчас групп."""
+    key = TRENDING_CACHE_KEY.format(kind='groups', limit=limit)
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(
+            Group.objects.filter(trend_score__isnull=False).order_by(
+                '-trend_score'
+            ).values_list('slug', 'title')[:limit]
+        )
+        cache.set(key, groups, TRENDING_TIMEOUT)
+    return groups
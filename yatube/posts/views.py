@@ -1,10 +1,38 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db.models import F
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.caching import cache_page_swr, cache_shell
+
+from .counters import counts_views, most_viewed
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .lookups import get_author, get_group, get_post
+from .models import GroupStats, Post, Follow
+from .scroll import feed_page, next_feed_url
+from .shells import (
+    author_scopes, group_scopes, groups_scopes, index_scopes, post_scopes,
+)
+from .trending import trending_groups, trending_post_ids
+
+
+def feed(posts):
+    """Посты для лент: с автором и группой, но без полного текста."""
+    return posts.select_related('author', 'group').defer('text')
+
+
+GROUP_SORTS = {
+    'recent': (F('last_post').desc(nulls_last=True), 'group__title'),
+    'posts': ('-posts_count', 'group__title'),
+    'authors': ('-authors_count', 'group__title'),
+    'title': ('group__title',),
+}
+GROUP_SORT_LABELS = (
+    ('recent', 'Свежие'),
+    ('posts', 'Больше постов'),
+    ('authors', 'Больше авторов'),
+    ('title', 'По названию'),
+)
 
 
 def make_paginator(request, object, pages):
@@ -14,46 +42,101 @@ def make_paginator(request, object, pages):
     return page_obj
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_shell(20, 60 * 5, key_prefix='index_page',
+             scopes=index_scopes)
 def index(request):
-    posts = Post.objects.all()
+    posts = feed(Post.objects.all())
     page_obj = make_paginator(request, posts, 10)
     template = 'posts/index.html'
     context = {
         'page_obj': page_obj,
+        'feed_url': next_feed_url(page_obj, 'posts:index_feed'),
+        'trending_groups': trending_groups(),
     }
     return render(request, template, context)
 
 
+@cache_shell(20, 60 * 5, key_prefix='index_feed',
+             scopes=index_scopes)
+def index_feed(request):
+    return feed_page(request, feed(Post.objects.all()), 'posts:index_feed')
+
+
+@cache_shell(20, 60 * 5, key_prefix='group_index',
+             scopes=groups_scopes)
+def group_index(request):
+    """Каталог групп по счетчикам GroupStats, без запросов к постам."""
+    sort = request.GET.get('sort')
+    if sort not in GROUP_SORTS:
+        sort = 'recent'
+    stats = GroupStats.objects.select_related('group').order_by(
+        *GROUP_SORTS[sort], 'pk'
+    )
+    context = {
+        'page_obj': make_paginator(request, stats, 20),
+        'sort': sort,
+        'sorts': GROUP_SORT_LABELS,
+        'page_query': f'sort={sort}&',
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@cache_shell(20, 60 * 5, key_prefix='group_page',
+             scopes=group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_group(slug)
     template = 'posts/group_list.html'
-    posts = group.posts.all()
+    posts = feed(group.posts.all())
     page_obj = make_paginator(request, posts, 10)
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'feed_url': next_feed_url(page_obj, 'posts:group_feed',
+                                  {'slug': slug}),
     }
     return render(request, template, context)
 
 
+@cache_shell(20, 60 * 5, key_prefix='group_feed',
+             scopes=group_scopes)
+def group_feed(request, slug):
+    group = get_group(slug)
+    return feed_page(request, feed(group.posts.all()), 'posts:group_feed',
+                     {'slug': slug})
+
+
+@cache_shell(20, 60 * 5, key_prefix='profile_page',
+             scopes=author_scopes)
 def profile(request, username):
     template = 'posts/profile.html'
-    post_author = get_object_or_404(User, username=username)
-    posts = post_author.posts.all()
+    post_author = get_author(username)
+    posts = feed(post_author.posts.all())
     page_obj = make_paginator(request, posts, 2)
     context = {
         'page_obj': page_obj,
         'post_author': post_author,
+        'feed_url': next_feed_url(page_obj, 'posts:profile_feed',
+                                  {'username': username}),
     }
     return render(request, template, context)
 
 
+@cache_shell(20, 60 * 5, key_prefix='profile_feed',
+             scopes=author_scopes)
+def profile_feed(request, username):
+    post_author = get_author(username)
+    return feed_page(request, feed(post_author.posts.all()),
+                     'posts:profile_feed', {'username': username})
+
+
+@counts_views
+@cache_shell(20, 60 * 5, key_prefix='post_page',
+             scopes=post_scopes)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(post_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'form': form,
@@ -62,6 +145,36 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+@cache_shell(60, 60 * 10, key_prefix='popular_page',
+             scopes=index_scopes)
+def popular(request):
+    """Самые просматриваемые посты за неделю."""
+    ranking = most_viewed()
+    posts = feed(Post.objects.all()).in_bulk([pk for pk, _ in ranking])
+    popular_posts = []
+    for pk, week_views in ranking:
+        if pk in posts:
+            posts[pk].week_views = week_views
+            popular_posts.append(posts[pk])
+    context = {
+        'posts': popular_posts,
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+@cache_shell(60, 60 * 10, key_prefix='trending_page',
+             scopes=index_scopes)
+def trending(request):
+    """Посты и группы, вокруг которых сейчас больше всего событий."""
+    ids = trending_post_ids()
+    posts = feed(Post.objects.all()).in_bulk(ids)
+    context = {
+        'posts': [posts[pk] for pk in ids if pk in posts],
+        'trending_groups': trending_groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/post_create.html'
@@ -81,6 +194,8 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
+    # Не get_post: копия из кэша могла устареть, и form.save() затер бы
+    # счетчик просмотров и оценку популярности, обновленные в обход нее.
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
@@ -103,7 +218,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -117,19 +232,28 @@ def add_comment(request, post_id):
 def follow_index(request):
     """Страница подписок текущего пользователя"""
     user = request.user
-    post_list = Post.objects.filter(author__following__user=user)
+    post_list = feed(Post.objects.filter(author__following__user=user))
     page_obj = make_paginator(request, post_list, 10)
     context = {
         'page_obj': page_obj,
         'user': user,
+        'feed_url': next_feed_url(page_obj, 'posts:follow_feed'),
     }
     return render(request, 'posts/follow_index.html', context)
 
 
+@login_required
+@cache_page_swr(20, 60 * 5, key_prefix='follow_feed',
+                scopes=index_scopes)
+def follow_feed(request):
+    posts = Post.objects.filter(author__following__user=request.user)
+    return feed_page(request, feed(posts), 'posts:follow_feed')
+
+
 @login_required
 def profile_follow(request, username):
     """Функция подписки на автора."""
-    author = User.objects.get(username=username)
+    author = get_author(username)
     user = request.user
     if user != author and not Follow.objects.filter(author=author,
                                                     user=user).exists():
@@ -140,7 +264,7 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     """Функция отмены подписки на автора."""
-    author = User.objects.get(username=username)
+    author = get_author(username)
     user = request.user
     follow_relationship = Follow.objects.get(author=author, user=user)
     follow_relationship.delete()
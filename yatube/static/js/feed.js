@@ -0,0 +1,50 @@
+// Бесконечная прокрутка лент: когда метка .feed-next появляется на экране,
+// подгружаем следующий фрагмент ленты и вставляем его перед меткой.
+// Без JavaScript остается обычная постраничная навигация.
+document.addEventListener('DOMContentLoaded', function () {
+  var marker = document.querySelector('[data-feed-next]');
+  if (!marker || !('IntersectionObserver' in window)) {
+    return;
+  }
+  var nav = document.querySelector('nav[aria-label="Page navigation"]');
+  if (nav) {
+    nav.hidden = true;
+  }
+  var loading = false;
+  var observer = new IntersectionObserver(function (entries) {
+    if (!entries[0].isIntersecting || loading) {
+      return;
+    }
+    loading = true;
+    fetch(marker.dataset.feedNext, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var fragment = document.createElement('div');
+        fragment.innerHTML = html;
+        var next = fragment.querySelector('[data-feed-next]');
+        if (next) {
+          next.remove();
+        }
+        marker.before.apply(marker, Array.from(fragment.childNodes));
+        if (next) {
+          marker.dataset.feedNext = next.dataset.feedNext;
+        } else {
+          observer.disconnect();
+          marker.remove();
+        }
+        loading = false;
+      })
+      .catch(function () {
+        observer.disconnect();
+        if (nav) {
+          nav.hidden = false;
+        }
+      });
+  }, {rootMargin: '600px'});
+  observer.observe(marker);
+});
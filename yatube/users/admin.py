@@ -1,3 +1,27 @@
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin
 
+from posts.models import User
+from posts.purge import purge_user
 
-# Register your models here.
+
+class PurgingUserAdmin(UserAdmin):
+    actions = ['purge_selected']
+
+    def purge_selected(self, request, queryset):
+        # Стандартное удаление собирает все связанные объекты в память,
+        # поэтому контент удаляется пакетами через purge_user.
+        purged = 0
+        for user in queryset.iterator():
+            purge_user(user)
+            purged += 1
+        self.message_user(
+            request, f'Удалено пользователей: {purged}', messages.SUCCESS
+        )
+    purge_selected.short_description = (
+        'Удалить пользователей вместе с контентом (пакетно)'
+    )
+
+
+admin.site.unregister(User)
+admin.site.register(User, PurgingUserAdmin)
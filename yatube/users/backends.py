@@ -0,0 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+User = get_user_model()
+
+USER_CACHE_TIMEOUT = 60 * 60
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
+# Набор полей входит в ключ: после миграции старые снимки не читаются.
+USER_FIELDS_VERSION = hashlib.md5(
+    ','.join(USER_FIELDS).encode()
+).hexdigest()[:8]
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{USER_FIELDS_VERSION}:{user_id}'
+
+
+def user_cache():
+    """Общий для всех процессов кэш снимков или None, если его нет."""
+    alias = settings.USER_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def invalidate_user(user_id):
+    cache = user_cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берет пользователя сессии из общего кэша.
+
+    В кэше хранится компактный снимок - кортеж значений полей модели,
+    из которого пользователь собирается без запроса к базе. Без общего
+    кэша (settings.USER_CACHE_ALIAS) работает как ModelBackend.
+    """
+
+    def get_user(self, user_id):
+        cache = user_cache()
+        if cache is None:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    key,
+                    tuple(getattr(user, name) for name in USER_FIELDS),
+                    USER_CACHE_TIMEOUT,
+                )
+            return user
+        user = User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, snapshot)
+        return user if self.user_can_authenticate(user) else None
@@ -1,3 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
+from users.backends import CachedModelBackend, user_cache_key
 
-# Create your tests here.
+User = get_user_model()
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+# В тестах один процесс, поэтому LocMemCache может изображать memcached.
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': LOCMEM},
+        'shared': {'BACKEND': LOCMEM, 'LOCATION': 'shared'},
+    },
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    SESSION_CACHE_ALIAS='shared',
+    USER_CACHE_ALIAS='shared',
+)
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.client.force_login(self.user)
+
+    def test_warm_feed_request_makes_no_queries(self):
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: auth')
+
+    def test_user_change_refreshes_snapshot(self):
+        self.client.get(reverse('posts:index'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Пользователь: auth')
+
+
+@override_settings(USER_CACHE_ALIAS=None)
+class UncachedAuthTests(TestCase):
+    def test_without_shared_cache_user_is_read_from_database(self):
+        user = User.objects.create_user(username='auth')
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedModelBackend().get_user(user.pk), user)
+        self.assertIsNone(cache.get(user_cache_key(user.pk)))
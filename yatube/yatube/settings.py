@@ -51,13 +51,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.TraceViewMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -66,14 +69,22 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    ('core.loaders.MinifyingLoader', [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ]),
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.following',
             ],
         },
     },
@@ -98,6 +109,32 @@ CACHES = {
     }
 }
 
+# Сессии и снимки пользователя сессии (users.backends) можно держать
+# только в кэше, общем для всех воркеров: выход, смена пароля и
+# блокировка сбрасывают кэш лишь в процессе, обработавшем запрос.
+# LocMemCache у каждого процесса свой, поэтому такой кэш включается
+# только с memcached (MEMCACHED_LOCATION=host:port[,host:port...]).
+# Без него, в том числе в конфигурации по умолчанию, каждый запрос
+# авторизованного пользователя по-прежнему читает сессию и пользователя
+# из базы: в продакшене MEMCACHED_LOCATION нужно задать.
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION.split(','),
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'shared'
+    USER_CACHE_ALIAS = 'shared'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    USER_CACHE_ALIAS = None
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -136,12 +173,37 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдачу медиа без DEBUG можно передать фронтенду: 'x-sendfile' (Apache,
+# lighttpd) или 'x-accel-redirect' (nginx, internal-локация ниже).
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Динамические HTML-страницы сжимаем быстрее, чем статику по умолчанию.
+COMPRESSION_LEVELS = {
+    'text/html': {'gzip': 5, 'br': 4},
+}
+
+# Доля запросов, для которых пишется трасса (0 - трассировка выключена).
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0))
+TRACE_LOG = os.path.join(BASE_DIR, 'traces.jsonl')
+
+# Как часто буфер просмотров постов сбрасывается в базу (0 - только вручную).
+VIEW_FLUSH_INTERVAL = 60
+
+# Как часто накопленные оценки популярности пишутся в базу.
+TRENDING_FLUSH_INTERVAL = 60
+
+# Карта сайта собирается командой build_sitemaps в статические файлы.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemap')
+SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL', 'http://localhost:8000')
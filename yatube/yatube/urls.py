@@ -17,7 +17,9 @@ Including another URLconf
 from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import media_serve, sitemap_serve, static_serve
 
 
 urlpatterns = [
@@ -28,7 +30,10 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
     path('create/', include('users.urls', namespace='create')),
-
+    re_path(
+        r'^(?P<path>sitemap\.xml|sitemaps/[\w-]+\.xml)$',
+        sitemap_serve,
+    ),
 ]
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
@@ -38,3 +43,14 @@ if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )
+else:
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'),
+            static_serve,
+        ),
+        re_path(
+            r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+            media_serve,
+        ),
+    ]
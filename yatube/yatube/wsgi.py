@@ -14,3 +14,23 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Прогрев шаблонов, URL и кэша до приема запросов. С gunicorn --preload
+# выполняется один раз в мастер-процессе и наследуется воркерами, поэтому
+# соединения с базой и кэшем после него закрываются: иначе все воркеры
+# получили бы после fork один и тот же сокет.
+if os.environ.get('YATUBE_WARMUP'):
+    import logging
+
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.db import connections
+
+    try:
+        call_command('warmup', verbosity=0)
+    except Exception:
+        logging.getLogger('django').exception('Прогрев не удался')
+    finally:
+        connections.close_all()
+        for cache in caches.all():
+            cache.close()